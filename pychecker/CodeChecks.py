@@ -23,6 +23,7 @@ from pychecker import OP
 from pychecker import Stack
 from pychecker import python
 from pychecker import pcmodules
+from pychecker import trace
 
 __pychecker__ = 'no-argsused'
 
@@ -91,14 +92,16 @@ def _checkFunctionArgs(code, func, objectReference, argCount, kwArgs,
     """
     func_name = func.function.func_code.co_name
     if kwArgs :
-        args_len = func.function.func_code.co_argcount
-        arg_names = func.function.func_code.co_varnames[argCount:args_len]
-        if argCount < args_len and kwArgs[0] in arg_names:
+        args_len = func.signature.argCount
+        # the positional arguments not passed, which can be named
+        first = argCount
+        if first <= func.argumentIndex(kwArgs[0]) < args_len:
             if cfg().namedArgs :
                 code.addWarning(msgs.FUNC_USES_NAMED_ARGS % func_name)
 
             # convert the named args into regular params, and really check
-            while argCount < args_len and kwArgs and kwArgs[0] in arg_names:
+            while argCount < args_len and kwArgs and \
+                  first <= func.argumentIndex(kwArgs[0]) < args_len:
                 argCount = argCount + 1
                 kwArgs = kwArgs[1:]
             _checkFunctionArgs(code, func, objectReference, argCount, kwArgs,
@@ -496,12 +499,8 @@ def _handleFunctionCall(codeSource, code, argCount, indexOffset=0,
     code.functionsCalled[funcName] = loadValue
 
 
-def _classHasAttribute(c, attr) :
-    return (c.methods.has_key(attr) or c.members.has_key(attr) or
-            hasattr(c.classObject, attr))
-
 def _checkClassAttribute(attr, c, code) :
-    if _classHasAttribute(c, attr) :
+    if c.hasAttribute(attr) :
         try :
             del c.memberRefs[attr]
         except KeyError :
@@ -543,8 +542,9 @@ def _getGlobalName(name, func) :
 
 
 def _checkNoEffect(code, ignoreStmtWithNoEffect=0):
-    if (not ignoreStmtWithNoEffect and
-        OP.POP_TOP(code.nextOpInfo()[0]) and cfg().noEffect):
+    if (not ignoreStmtWithNoEffect and cfg().noEffect and
+        cfg().warns(msgs.POSSIBLE_STMT_WITH_NO_EFFECT) and
+        OP.POP_TOP(code.nextOpInfo()[0])):
         code.addWarning(msgs.POSSIBLE_STMT_WITH_NO_EFFECT)
     
 def _makeConstant(code, index, factoryFunction) :
@@ -591,7 +591,7 @@ def _handleComparison(stack, operand) :
     si = min(len(stack), num_ops)
     compareValues = stack[-si:]
     for _ in range(si, 2) :
-        compareValues.append(Stack.Item(None, None))
+        compareValues.append(Stack.NONE)
     stack[-si:] = [ Stack.makeComparison(compareValues, operand) ]
     return compareValues
         
@@ -612,7 +612,7 @@ def _handleDeprecated(code, name):
     except KeyError:
         return False
     else:
-        if cfg().deprecated:
+        if cfg().deprecated and cfg().warns(msgs.USING_DEPRECATED_MODULE):
             msg = msgs.USING_DEPRECATED_MODULE % name
             if undeprecated:
                 msg.data = msg.data + msgs.USE_INSTEAD % undeprecated
@@ -847,6 +847,9 @@ def _getFormatString(code, codeSource) :
 
     
 def _getFormatWarnings(code, codeSource) :
+    # the format warnings are errors, except NO_LOCAL_VAR
+    if not cfg().warns(msgs.INVALID_FORMAT) :
+        return
     formatString = _getFormatString(code, codeSource)
     if not formatString :
         return
@@ -907,7 +910,7 @@ def _checkAttributeType(code, stackValue, attr) :
             continue
 
         if hasattr(varType, 'ignoreAttrs') :
-            if varType.ignoreAttrs or _classHasAttribute(varType, attr) :
+            if varType.ignoreAttrs or varType.hasAttribute(attr) :
                 return
         elif not hasattr(varType, 'attributes') or attr in varType.attributes :
             return
@@ -928,19 +931,7 @@ def _getTypeStr(t):
     return returnStr
 
 
-def _getLineNum(co, instr_index):
-    co_lnotab = co.co_lnotab
-    lineno = co.co_firstlineno
-    addr = 0
-    for lnotab_index in range(0, len(co_lnotab), 2):
-        addr = addr + ord(co_lnotab[lnotab_index])
-        if addr > instr_index:
-            return lineno
-        lineno = lineno + ord(co_lnotab[lnotab_index+1])
-    return lineno
-
-
-class Code :
+class Code(object) :
     """
     Hold all the code state information necessary to find warnings.
 
@@ -948,10 +939,12 @@ class Code :
     @type bytes:        str
     @ivar func_code:    the function code object
     @type func_code:    L{types.CodeType}
-    @ivar index:        index into bytes for the current instruction
+    @ivar instructions: the decoded instructions of func_code
+    @type instructions: L{OP.Instructions}
+    @ivar opIndex:      index into instructions for the next instruction
+    @type opIndex:      int
+    @ivar index:        index into bytes for the next instruction
     @type index:        int
-    @ivar extended_arg: extended argument for the current instruction
-    @type extended_arg: int
     @ivar maxCode:      length of bytes
     @type maxCode:      int
     @ivar stack:        
@@ -975,6 +968,15 @@ class Code :
     @type cells:        dict of int -> L{Stack.Item}
     """
 
+    __slots__ = ('bytes', 'func', 'func_code', 'instructions', 'opIndex',
+                 'index', 'indexList', 'label', 'lastLineNum', 'maxCode',
+                 'has_except', 'try_finally_first',
+                 'starts_and_ends_with_finally', 'returnValues',
+                 'raiseValues', 'stack', 'unpackCount', 'loops', 'branches',
+                 'warnings', 'globalRefs', 'unusedLocals', 'deletedLocals',
+                 'functionsCalled', 'typeMap', 'constants', 'codeObjects',
+                 'codeOrder', 'cells', 'tracing')
+
     # opcodes are either 1 byte (no argument) or 3 bytes (with argument) long
     # opcode can be EXTENDED_ARGS which then accumulates to the previous arg
     # to span values > 64K
@@ -982,9 +984,10 @@ class Code :
         self.bytes = None
         self.func = None
         self.func_code = None
+        self.instructions = None
+        self.opIndex = 0
         self.index = 0
         self.indexList = []
-        self.extended_arg = 0
         self.lastLineNum = 0
         self.maxCode = 0
         self.has_except = 0
@@ -1010,16 +1013,21 @@ class Code :
         self.codeObjects = {}
         self.codeOrder = []
         self.cells = {}
+        self.tracing = 0
 
     def init(self, func):
         """
         @type  func:        L{function.Function}
         """
         self.func = func
-        self.func_code, self.bytes, self.index, self.maxCode, self.extended_arg = \
-                        OP.initFuncCode(func.function)
+        self.func_code = func.function.func_code
+        self.bytes = self.func_code.co_code
+        self.instructions = OP.getInstructions(self.func_code)
+        self.opIndex = self.index = 0
+        self.maxCode = len(self.bytes)
         self.lastLineNum = self.func_code.co_firstlineno
         self.returnValues = []
+        self.updateTracing()
 
         # initialize the arguments to unused
         for arg in func.arguments() :
@@ -1030,8 +1038,7 @@ class Code :
         line = self.lastLineNum
         # if we don't have linenum info, calc it from co_lntab & index
         if line == self.func_code.co_firstlineno:
-            # FIXME: this could be optimized, if we kept last line info
-            line = _getLineNum(self.func_code, self.index - 1)
+            line = self.instructions.getLineNum(self.index - 1)
         return line
 
     def getWarning(self, err, line = None) :
@@ -1050,7 +1057,8 @@ class Code :
         w = err
         if not isinstance(w, Warning.Warning):
             w = self.getWarning(err, line)
-        utils.debug('adding warning: %s', w.format())
+        if self.tracing:
+            trace.warning(w)
         self.warnings.append(w)
 
     def popNextOp(self) :
@@ -1062,43 +1070,106 @@ class Code :
         The operand is the object referenced by the oparg, from the
         respective array (co_consts, co_names, co_varnames)
 
-        Changes L{index} and L{extended_arg} to point to the next operation.
+        Changes L{opIndex} and L{index} to point to the next operation.
 
         @returns: tuple of (opcode, oparg, operand)
         @rtype:   tuple of (int, int, object)
         """
-        self.indexList.append(self.index)
-        info = OP.getInfo(self.bytes, self.index, self.extended_arg)
-        op, oparg, self.index, self.extended_arg = info
+        # only the last three offsets are used
+        indexList = self.indexList
+        indexList.append(self.index)
+        if len(indexList) > 3 :
+            del indexList[0]
+        instructions = self.instructions
+        i = self.opIndex
+        op = instructions.ops[i]
+        oparg = instructions.opargs[i]
+        operand = instructions.operands[i]
+        self.opIndex = i + 1
+        self.index = instructions.offsets[i + 1]
         if op < OP.HAVE_ARGUMENT :
-            utils.debug("DIS  %d %s" % (self.indexList[-1], OP.name[op]))
-            operand = None
+            if self.tracing:
+                trace.instruction(self.indexList[-1], OP.name[op])
         else :
-            operand = OP.getOperand(op, self.func_code, oparg)
-            self.label = label = OP.getLabel(op, oparg, self.index)
-            utils.debug("DIS  %d %s" % (self.indexList[-1], OP.name[op]), oparg, operand)
+            self.label = label = instructions.getLabel(i)
+            if self.tracing:
+                trace.instruction(self.indexList[-1], OP.name[op], oparg,
+                                  operand)
             if label != None :
                 self.addBranch(label)
 
         return op, oparg, operand
 
+    def popConstantRun(self, end) :
+        """
+        Pops the instructions up to instruction number end at once, which
+        build a list, tuple or dict of constants as found by
+        L{OP.Instructions}, and pushes the result.
+
+        This gives the same result as dispatching each instruction, without
+        pushing and popping each constant.
+        """
+        instructions = self.instructions
+        start = self.opIndex
+        offsets = instructions.offsets
+        if self.tracing:
+            for i in range(start, end):
+                if instructions.ops[i] < OP.HAVE_ARGUMENT:
+                    trace.instruction(offsets[i], OP.name[instructions.ops[i]])
+                else:
+                    trace.instruction(offsets[i], OP.name[instructions.ops[i]],
+                                      instructions.opargs[i],
+                                      instructions.operands[i])
+
+        # only the last three offsets are used
+        indexList = self.indexList
+        indexList.extend(offsets[max(start, end - 3):end])
+        del indexList[:-3]
+        self.opIndex = end
+        self.index = offsets[end]
+        self.label = None
+
+        ops = instructions.ops
+        if OP.LOAD_CONST(ops[start]) :
+            # LOAD_CONST for each item, then BUILD_LIST or BUILD_TUPLE
+            values = [_make_const(instructions.operands[i])
+                      for i in range(start, end - 1) if OP.LOAD_CONST(ops[i])]
+            if OP.BUILD_LIST(ops[end - 1]) :
+                self.stack.append(Stack.makeList(values))
+            else :
+                self.stack.append(Stack.makeTuple(values))
+            _checkNoEffect(self)
+        else :
+            # BUILD_MAP, then the items are stored into the dict one by one
+            self.stack.append(Stack.makeDict())
+
     def nextOpInfo(self, offset = 0) :
         """
         Peeks ahead at the next instruction.
 
+        @param offset: number of bytes past the next instruction to peek at
+
         @returns: tuple of (opcode, oparg, index) or (-1, 0, -1) if no next
         @rtype:   tuple of (int, int, int)
         """
-        try :
-            return OP.getInfo(self.bytes, self.index + offset, 0)[0:3]
-        except IndexError :
+        instructions = self.instructions
+        i = self.opIndex
+        if offset:
+            i = instructions.numbers.get(self.index + offset)
+            if i is None:
+                # not the start of an instruction, decode the raw bytes
+                try :
+                    return OP.getInfo(self.bytes, self.index + offset, 0)[0:3]
+                except IndexError :
+                    return -1, 0, -1
+        if i >= len(instructions):
             return -1, 0, -1
+        return (instructions.ops[i], instructions.opargs[i],
+                instructions.offsets[i + 1])
 
     def getFirstOp(self) :
         # find the first real op, maybe we should not check if params are used
-        i = extended_arg = 0
-        while i < self.maxCode :
-            op, oparg, i, extended_arg = OP.getInfo(self.bytes, i, extended_arg)
+        for op in self.instructions.ops :
             if not OP.LINE_NUM(op) :
                 if not (OP.LOAD_CONST(op) or OP.LOAD_GLOBAL(op)) :
                     return op
@@ -1218,7 +1289,15 @@ class Code :
             # pass the location of the __pychecker__ arguments
             utils.updateCheckerArgs(self.stack[-1].data, self.func_code,
                                     self.getLineNum(), self.warnings)
+            self.updateTracing()
         return rc
+
+    def updateTracing(self) :
+        """
+        Trace the instructions and warnings when tracing is enabled, or
+        when the configuration in effect has the debug option.
+        """
+        self.tracing = trace.enabled or cfg().debug
         
     def updateModuleLineNums(self, module, operand) :
         """
@@ -1257,6 +1336,8 @@ class CodeSource:
     @type in_class:     int (used as bool)
     @ivar calling_code: list of functions that call this source
     @type calling_code: list of callable
+    @ivar budget:       the instructions and time left for checking
+    @type budget:       L{pychecker.warn._Budget}
     
     """
     def __init__(self, module, func, c, main, in_class, code):
@@ -1267,6 +1348,7 @@ class CodeSource:
         self.in_class = in_class
         self.code = code
         self.calling_code = []
+        self.budget = None
 
 def _checkException(code, name) :
     if code.stack and code.stack[-1].type == Stack.TYPE_EXCEPT :
@@ -1529,7 +1611,8 @@ def _checkAttribute(top, operand, codeSource, code) :
         _checkAttributeType(code, top, operand)
 
 def _checkExcessiveReferences(code, top, extraAttr = None) :
-    if cfg().maxReferences <= 0 :
+    if cfg().maxReferences <= 0 or \
+       not cfg().warns(msgs.TOO_MANY_REFERENCES) :
         return
 
     try :
@@ -1568,7 +1651,7 @@ def _LOAD_ATTR(oparg, operand, codeSource, code) :
         top.addAttribute(operand)
 
         if len(top.data) == 2:
-            if cfg().deprecated:
+            if cfg().deprecated and cfg().warns(msgs.USING_DEPRECATED_ATTR):
                 _checkDeprecated(code, top.data)
 
             try:
@@ -1590,7 +1673,7 @@ def _LOAD_ATTR(oparg, operand, codeSource, code) :
 def _ok_to_set_attr(classObject, basename, attr) :
     return (cfg().onlyCheckInitForMembers and classObject != None and
             basename == cfg().methodArgName and 
-            not _classHasAttribute(classObject, attr))
+            not classObject.hasAttribute(attr))
 
 def _STORE_ATTR(oparg, operand, codeSource, code) :
     if code.stack :
@@ -1784,17 +1867,25 @@ def _IMPORT_STAR(oparg, operand, codeSource, code):
 
 # Python 2.3 introduced some optimizations that create problems
 # this is a utility for ignoring these cases
-def _shouldIgnoreCodeOptimizations(code, bytecodes, offset, length=None):
+def _shouldIgnoreCodeOptimizations(code, sequence):
+    """
+    @param sequence: the (opcode, oparg) pairs of the instructions
+                     directly preceding the current instruction
+    @type  sequence: tuple of (int, int)
+    """
     if utils.pythonVersion() < utils.PYTHON_2_3:
         return 0
 
-    if length is None:
-        length = offset - 1
-    try:
-        start = code.index - offset
-        return bytecodes == code.bytes[start:start+length]
-    except IndexError:
+    instructions = code.instructions
+    # opIndex already points past the current instruction
+    start = code.opIndex - 1 - len(sequence)
+    if start < 0:
         return 0
+    for op, oparg in sequence:
+        if instructions.ops[start] != op or instructions.opargs[start] != oparg:
+            return 0
+        start = start + 1
+    return 1
 
 # In Python 2.3, a, b = 1,2 generates this code:
 # ...
@@ -1805,10 +1896,10 @@ def _shouldIgnoreCodeOptimizations(code, bytecodes, offset, length=None):
 #
 # which generates a Possible stmt w/no effect
 
-# ROT_TWO = 2; JUMP_FORWARD = 110; 2, 0 is the offset (2)
-_IGNORE_SEQ = '%c%c%c%c' % (2, 110, 2, 0)
+# ROT_TWO = 2; JUMP_FORWARD = 110; 2 is the offset
+_IGNORE_SEQ = ((2, 0), (110, 2))
 def _shouldIgnoreNoEffectWarning(code):
-    return _shouldIgnoreCodeOptimizations(code, _IGNORE_SEQ, 5)
+    return _shouldIgnoreCodeOptimizations(code, _IGNORE_SEQ)
 
 def _DUP_TOP(oparg, operand, codeSource, code) :
     if len(code.stack) > 0 :
@@ -1878,7 +1969,9 @@ def _BUILD_LIST(oparg, operand, codeSource, code) :
     # Works as BUILD_TUPLE, but creates a list.
     _makeConstant(code, oparg, Stack.makeList)
 def _STORE_MAP(oparg, operand, codeSource, code) :
-    _popn(code, 2)
+    # the dict being stored into was just built, so unlike STORE_SUBSCR
+    # it is never a default argument being modified
+    code.popStackItems(2)
 
 # Creates a new class object. TOS is the methods dictionary, TOS1 the tuple
 # of the names of the base classes, and TOS2 the class name.
@@ -2364,10 +2457,10 @@ def _is_unreachable(code, topOfStack, branch, ifFalse) :
 #
 # which generates a Using a conditional statement with a constant value
 
-# JUMP_FORWARD = 110; 4, 0 is the offset (4)
-_IGNORE_BOGUS_JUMP = '%c%c%c' % (110, 4, 0)
+# JUMP_FORWARD = 110; 4 is the offset
+_IGNORE_BOGUS_JUMP = ((110, 4),)
 def _shouldIgnoreBogusJumps(code):
-    return _shouldIgnoreCodeOptimizations(code, _IGNORE_BOGUS_JUMP, 6, 3)
+    return _shouldIgnoreCodeOptimizations(code, _IGNORE_BOGUS_JUMP)
 
 def _checkConstantCondition(code, topOfStack, ifFalse, nextIsPop):
     # don't warn when doing (test and 'true' or 'false')
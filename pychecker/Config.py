@@ -61,6 +61,18 @@ _OPTIONS = (
  ('',  0, 'quixote', None, 'support Quixote\'s PTL modules'),
  ('',  1, 'evil', 'evil', 'list of evil C extensions that crash the interpreter'),
  ('',  0, 'keepgoing', 'ignoreImportErrors', 'ignore import errors'),
+ ('',  1, 'jobs', 'jobs', 'number of processes to check files with'),
+ ('',  1, 'cachedir', 'cacheDir', 'directory to cache warnings for unchanged files in'),
+ ('',  1, 'cachesize', 'cacheSize', 'maximum number of files to cache warnings for'),
+ ('',  0, 'incremental', 'incremental', 'only check files which changed or import changed files since the last run'),
+ ('',  1, 'server', 'server', 'check files sent to this unix socket, keeping modules loaded'),
+ ('',  1, 'connect', 'connect', 'send the files to check to the server on this unix socket'),
+ ('',  0, 'static', 'static', 'load modules from their code without running them'),
+ ('',  0, 'stream', 'stream', 'print the warnings of each module as soon as it is checked'),
+ ('',  0, 'streamsorted', 'streamSorted', 'like stream, but print all warnings sorted at the end, keeping one module\'s warnings in memory'),
+ ('',  0, 'stats', 'stats', 'report the time spent by phase, module, opcode handler and function'),
+ ('',  1, 'statsfile', 'statsFile', 'file to write the --stats timing to as JSON'),
+ ('',  1, 'tracefile', 'traceFile', 'file to write a trace of the checked instructions and warnings to'),
      ]),
     ('Error Control', [
  ('i', 0, 'import', 'importUsed', 'unused imports'),
@@ -136,6 +148,9 @@ _OPTIONS = (
  ('J', 1, 'maxargs', 'maxArgs', 'maximum # of arguments to a function'),
  ('K', 1, 'maxlocals', 'maxLocals', 'maximum # of locals in a function'),
  ('5', 1, 'maxrefs', 'maxReferences', 'maximum # of identifier references (Law of Demeter)'),
+ ('',  1, 'maxinstructions', 'maxInstructions', 'maximum # of instructions checked in a function, 0 for no limit'),
+ ('',  1, 'maxmilliseconds', 'maxMilliseconds', 'maximum milliseconds spent checking a function, 0 for no limit'),
+ ('',  1, 'maxmodulemilliseconds', 'maxModuleMilliseconds', 'maximum milliseconds spent checking the code of a module, 0 for no limit'),
  ('m', 0, 'moduledoc', 'noDocModule', 'no module doc strings'),
  ('c', 0, 'classdoc', 'noDocClass', 'no class doc strings'),
  ('f', 0, 'funcdoc', 'noDocFunc', 'no function/method doc strings'),
@@ -233,12 +248,27 @@ class Config :
 
         # files to process (typically from cmd line)
         self.files = {}
+        # whether to keep the code state of each function checked in
+        # PyCheckerModule.codes (for testing)
+        self.keepCodes = 0
 
         self.debug = 0
         self.quiet = 0
         self.only = 0
         self.level = 0
         self.limit = 10
+        self.jobs = 1
+        self.cacheDir = ''
+        self.cacheSize = 1000
+        self.incremental = 0
+        self.server = ''
+        self.connect = ''
+        self.static = 0
+        self.stream = 0
+        self.streamSorted = 0
+        self.stats = 0
+        self.statsFile = ''
+        self.traceFile = ''
 
         self.ignoreImportErrors = 0
         self.onlyCheckInitForMembers = 0
@@ -304,6 +334,9 @@ class Config :
         self.maxArgs = 10
         self.maxLocals = 40
         self.maxReferences = 5
+        self.maxInstructions = 0
+        self.maxMilliseconds = 0
+        self.maxModuleMilliseconds = 0
 
         self.slots = 1
         self.emptySlots = 1
@@ -390,6 +423,18 @@ class Config :
             suppressionRegexs.update(updates[1])
         return suppressions, suppressionRegexs
 
+    def warns(self, err) :
+        """
+        Checks whose warnings are below the --level are not done at all, so
+        each check asks this besides its own option.
+
+        @type  err: L{msgs.WarningClass}
+
+        @rtype: int (used as bool)
+        @returns: whether warnings like err are kept
+        """
+        return err.level >= self.level
+
     def processArgs(self, argList, otherConfigFiles = None) :
         try :
             args, files = getopt.getopt(argList, _SHORT_ARGS, _LONG_ARGS)
@@ -458,6 +503,22 @@ class Config :
 
         return files
 
+class Layer(Config) :
+    """
+    Configuration pushed on top of another one.  It shares the options of
+    the configuration below until one of them is set, and only then copies
+    them, turning into a plain L{Config}.
+    """
+
+    def __init__(self, parent) :
+        # setting __dict__ does not go through __setattr__
+        self.__dict__ = parent.__dict__
+
+    def __setattr__(self, name, value) :
+        self.__dict__ = self.__dict__.copy()
+        self.__class__ = Config
+        setattr(self, name, value)
+
 def printArg(shortArg, longArg, description, defaultValue, useValue) :
     defStr = ''
     shortArgStr = '   '
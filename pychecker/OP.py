@@ -11,6 +11,10 @@ Very similar to the dis and opcode module, but dis does not exist in Jython,
 so recreate the small portion we need here.
 """
 
+import array
+import types
+import bisect
+
 from pychecker import utils
 
 def LINE_NUM(op):              return op == 127
@@ -43,6 +47,7 @@ def RAISE_VARARGS(op):         return op == 130
 def POP_BLOCK(op):             return op == 87
 def END_FINALLY(op):           return op == 88
 def CALL_FUNCTION(op):         return op == 131
+def BUILD_LIST(op):            return op == 103
 
 def UNPACK_SEQUENCE(op) :
     "Deal w/Python 1.5.2 (UNPACK_[LIST|TUPLE]) or 2.0 (UNPACK_SEQUENCE)"
@@ -134,6 +139,218 @@ def getInfo(code, index, extended_arg) :
         oparg, extended_arg = 0, 0
     return op, oparg, index, extended_arg
 
+def _makeArray(typecode, values):
+    """
+    Pack the given integers into an array; fall back to the list if
+    a value does not fit in the array's C type.
+    """
+    try:
+        return array.array(typecode, values)
+    except OverflowError:
+        return values
+
+# a list or tuple built from at least this many constants, or a dict with
+# at least this many constant items, is checked as a whole
+MIN_CONSTANT_RUN = 8
+
+_LOAD_CONST = 100
+_BUILD_SEQUENCE = (102, 103,)   # BUILD_TUPLE, BUILD_LIST
+if utils.pythonVersion() >= utils.PYTHON_2_7:
+    _BUILD_MAP = 105
+else:
+    _BUILD_MAP = 104
+_STORE_MAP = 54
+
+def _isConstant(op, operand):
+    # code objects are not simply pushed; see CodeChecks._LOAD_CONST
+    return op == _LOAD_CONST and type(operand) != types.CodeType
+
+def _findConstantRuns(ops, operands, opargs, offsets, labels):
+    """
+    Find the instructions which only build a list, tuple or dict of
+    constants, and which nothing jumps into.
+
+    @rtype:   dict of int -> int
+    @returns: instruction number of the first instruction of each run ->
+              instruction number after its last instruction
+    """
+    runs = {}
+    count = len(ops)
+    i = 0
+    while i < count:
+        start = i
+        if _isConstant(ops[i], operands[i]):
+            constants = 0
+            while i < count and (_isConstant(ops[i], operands[i]) or
+                                 ops[i] == EXTENDED_ARG):
+                if ops[i] == _LOAD_CONST:
+                    constants = constants + 1
+                i = i + 1
+            if i < count and ops[i] in _BUILD_SEQUENCE and \
+               opargs[i] == constants and constants >= MIN_CONSTANT_RUN:
+                i = i + 1
+                runs[start] = i
+        elif ops[i] == _BUILD_MAP:
+            i = i + 1
+            items = 0
+            while i + 2 < count and _isConstant(ops[i], operands[i]) and \
+                  _isConstant(ops[i + 1], operands[i + 1]) and \
+                  ops[i + 2] == _STORE_MAP:
+                items = items + 1
+                i = i + 3
+            if items >= MIN_CONSTANT_RUN:
+                runs[start] = i
+        else:
+            i = i + 1
+
+    if runs:
+        targets = {}
+        for label in labels:
+            targets[label] = 1
+        for start, end in runs.items():
+            for number in range(start + 1, end):
+                if targets.has_key(offsets[number]):
+                    del runs[start]
+                    break
+    return runs
+
+class Instructions:
+    """
+    The decoded instructions of a code object, stored as parallel arrays
+    indexed by instruction number.
+
+    EXTENDED_ARG is kept as an instruction of its own, and its value is
+    folded into the oparg of the instruction following it, the same way
+    L{getInfo} does.
+
+    @ivar ops:      opcode of each instruction
+    @type ops:      array of int
+    @ivar opargs:   argument of each instruction, 0 if it has none
+    @type opargs:   array of int
+    @ivar operands: the object each oparg references, or None
+    @type operands: list of object
+    @ivar labels:   jump target of each instruction, -1 if it does not jump
+    @type labels:   array of int
+    @ivar offsets:  start offset in co_code of each instruction; has an
+                    extra entry at the end holding len(co_code)
+    @type offsets:  array of int
+    @ivar numbers:  start offset -> instruction number
+    @type numbers:  dict of int -> int
+    @ivar lineStarts: sorted offsets at which a new line starts; built from
+                      co_lnotab on the first call to L{getLineNum}
+    @type lineStarts: array of int
+    @ivar lines:      line number before each entry in lineStarts, followed
+                      by the line number after the last one
+    @type lines:      array of int
+    @ivar constantRuns: instruction number -> instruction number after the
+                        instructions starting there which only build a
+                        list, tuple or dict of constants
+    @type constantRuns: dict of int -> int
+    """
+
+    def __init__(self, func_code):
+        """
+        @type  func_code: L{types.CodeType} or L{function.FakeCode}
+        """
+        self.func_code = func_code
+        self.lineStarts = self.lines = None
+
+        ops, opargs, operands, labels, offsets = [], [], [], [], []
+        code = func_code.co_code
+        i, maxCode, extended_arg = 0, len(code), 0
+        while i < maxCode:
+            offsets.append(i)
+            op, oparg, i, extended_arg = getInfo(code, i, extended_arg)
+            operand, label = None, None
+            if op >= HAVE_ARGUMENT:
+                operand = getOperand(op, func_code, oparg)
+                label = getLabel(op, oparg, i)
+            ops.append(op)
+            opargs.append(oparg)
+            operands.append(operand)
+            if label is None:
+                label = -1
+            labels.append(label)
+        offsets.append(maxCode)
+
+        self.ops = _makeArray('B', ops)
+        self.opargs = _makeArray('l', opargs)
+        self.operands = operands
+        self.labels = _makeArray('l', labels)
+        self.offsets = _makeArray('l', offsets)
+        self.numbers = {}
+        for number in range(len(offsets)):
+            self.numbers[offsets[number]] = number
+        self.constantRuns = _findConstantRuns(ops, operands, opargs,
+                                              offsets, labels)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def getLabel(self, number):
+        """
+        @returns: the jump target of the given instruction, or None
+        @rtype:   int or None
+        """
+        label = self.labels[number]
+        if label < 0:
+            return None
+        return label
+
+    def _setupLines(self):
+        co_lnotab = self.func_code.co_lnotab
+        lineno = self.func_code.co_firstlineno
+        lineStarts, lines = [], [lineno]
+        addr = 0
+        for lnotab_index in range(0, len(co_lnotab), 2):
+            addr = addr + ord(co_lnotab[lnotab_index])
+            lineno = lineno + ord(co_lnotab[lnotab_index+1])
+            lineStarts.append(addr)
+            lines.append(lineno)
+        self.lineStarts = _makeArray('l', lineStarts)
+        self.lines = _makeArray('l', lines)
+
+    def getLineNum(self, offset):
+        """
+        @param offset: offset in co_code of an instruction
+
+        @returns: the source line number for the instruction at offset
+        @rtype:   int
+        """
+        if self.lineStarts is None:
+            self._setupLines()
+        return self.lines[bisect.bisect_right(self.lineStarts, offset)]
+
+# code object id -> (code object, L{Instructions});
+# keeping the code object alive makes sure its id is not reused
+_instructions_cache = {}
+
+def getInstructions(func_code):
+    """
+    Return the decoded instructions for the given code object.
+    The instructions are decoded once per code object and cached;
+    a L{function.FakeCode} shares the entry of the code it wraps.
+
+    @type  func_code: L{types.CodeType} or L{function.FakeCode}
+
+    @rtype: L{Instructions}
+    """
+    func_code = getattr(func_code, 'realCode', func_code)
+    entry = _instructions_cache.get(id(func_code))
+    if entry is not None and entry[0] is func_code:
+        return entry[1]
+
+    instructions = Instructions(func_code)
+    _instructions_cache[id(func_code)] = (func_code, instructions)
+    return instructions
+
+def clearInstructions():
+    """
+    Forget the decoded instructions, which keep their code objects alive.
+    They are decoded again when needed.
+    """
+    _instructions_cache.clear()
+
 def initFuncCode(func) :
     """Returns (func_code, code, i, maxCode, extended_arg) based on func,
        this is a helper function to setup looping through byte code"""
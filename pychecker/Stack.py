@@ -23,13 +23,16 @@ TYPE_EXCEPT = "-except-"
 
 # conventions for Items:
 # a method call has data ('self', methodName), type ATTRIBUTE
-class Item:
+class Item(object):
     """
     Representation of data on the stack
 
     @ivar is_really_string: whether the stack item really is a string.
     """
 
+    # one is created for every push, and handlers change them in place
+    __slots__ = ('data', 'type', 'const', 'length', 'is_really_string')
+
     def __init__(self, data, dataType, const=0, length=0):
         """
         @param data:     the actual data of the stack item
@@ -227,6 +230,9 @@ def makeFuncReturnValue(stackValue, argCount) :
         data = LOCALS
     return Item(data, TYPE_FUNC_RETURN)
 
+# stands in for a missing operand of a comparison; never changed
+NONE = Item(None, None)
+
 def makeComparison(stackItems, comparison) :
     return Item((stackItems[0], comparison, stackItems[1]), TYPE_COMPARISON)
 
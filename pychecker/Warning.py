@@ -9,7 +9,7 @@ Warning class to hold info about each warning.
 """
 
 
-class Warning :
+class Warning(object) :
     """
     Class which holds warning information.
 
@@ -20,6 +20,8 @@ class Warning :
     @type err:  L{msgs.WarningClass}
     """
 
+    __slots__ = ('file', 'line', 'err', 'level')
+
     def __init__(self, file, line, err) :
         """
         @param file: an object from which the file where the warning
@@ -0,0 +1,475 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+"""
+On-disk cache of the warnings found for a module, so unchanged modules
+do not need to be imported and checked again.
+
+An entry is keyed on the module source, the path it was given as, the
+python and pychecker versions and a fingerprint of the configuration and
+suppressions, which leaves out the other files checked.  It also records the hashes of the modules it imports,
+directly or indirectly, and is only used as long as those are unchanged
+as well.
+
+Warnings are pickled with L{getPickler}, which keeps the msgs constants
+they refer to, as those are compared by identity.
+
+For incremental checking, the graph of imported modules of a run is
+stored instead, and a module is checked again when it or any module it
+imports, directly or indirectly, changed.
+"""
+
+import os
+import sys
+import cPickle
+import hashlib
+import tempfile
+import cStringIO
+
+from pychecker import utils
+from pychecker import Config
+from pychecker import msgs
+
+# members of Config.Config which do not change the warnings found;
+# the limit is applied after merging cached and new warnings, and the
+# files given only matter with --only, for the file itself
+_IGNORED_MEMBERS = ('files', 'debug', 'quiet', 'limit', 'jobs',
+                    'cacheDir', 'cacheSize', 'incremental',
+                    'server', 'connect', 'stream', 'streamSorted',
+                    'stats', 'statsFile', 'traceFile', 'keepCodes')
+
+DEFAULT_DIRECTORY = '~/.cache/pychecker'
+
+# changed whenever the pickled form of what is stored changes
+_FORMAT = '3'
+
+_TMP_PREFIX = 'tmp'
+_GRAPH_PREFIX = 'graph-'
+
+
+# msgs constants are pickled by name, as they compare by identity
+_MSGS_NAMES = {}
+for _name, _value in vars(msgs).items():
+    if isinstance(_value, msgs.WarningClass):
+        _MSGS_NAMES[id(_value)] = _name
+del _name, _value
+
+def _persistentId(obj):
+    return _MSGS_NAMES.get(id(obj))
+
+def _persistentLoad(name):
+    try:
+        return getattr(msgs, name)
+    except AttributeError:
+        raise cPickle.UnpicklingError('unknown message %s' % name)
+
+def getPickler(f):
+    """
+    @returns: a pickler writing to f which keeps the msgs constants
+              referred to by warnings
+    @rtype:   L{cPickle.Pickler}
+    """
+    pickler = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = _persistentId
+    return pickler
+
+def getUnpickler(f):
+    """
+    @returns: an unpickler reading what L{getPickler} wrote to f
+    @rtype:   L{cPickle.Unpickler}
+    """
+    unpickler = cPickle.Unpickler(f)
+    unpickler.persistent_load = _persistentLoad
+    return unpickler
+
+def dumps(data):
+    """
+    @rtype: str
+    """
+    f = cStringIO.StringIO()
+    getPickler(f).dump(data)
+    return f.getvalue()
+
+def loads(data):
+    """
+    @type data: str
+    """
+    return getUnpickler(cStringIO.StringIO(data)).load()
+
+def _hashFile(filename):
+    """
+    @rtype: str or None if the file can not be read
+    """
+    try:
+        f = open(filename, 'rb')
+        try:
+            return hashlib.sha1(f.read()).hexdigest()
+        finally:
+            f.close()
+    except IOError:
+        return None
+
+def _fingerprint(cfg, suppressions):
+    """
+    @type  cfg:          L{Config.Config}
+    @param suppressions: tuple of suppressions, suppressionRegexs dicts
+
+    @rtype: str
+    """
+    items = []
+    for member, value in cfg.__dict__.items():
+        if member in _IGNORED_MEMBERS:
+            continue
+        if type(value) == type({}):
+            value = value.items()
+            value.sort()
+        items.append((member, value))
+    items.sort()
+
+    if suppressions is None:
+        suppressions = {}, {}
+    names = suppressions[0].items()
+    names.sort()
+    regexs = [(regex.pattern, value)
+              for regex, value in suppressions[1].items()]
+    regexs.sort()
+
+    return repr((items, names, regexs))
+
+def _getKey(cfg, suppressions):
+    """
+    @rtype: str
+    """
+    return '\0'.join((sys.version, Config._VERSION, _FORMAT, os.getcwd(),
+                      _fingerprint(cfg, suppressions)))
+
+def _getDependencies(pcmodule):
+    """
+    @type  pcmodule: L{pcmodules.PyCheckerModule}
+
+    @rtype:   list of (str, float, str)
+    @returns: the filename, modification time and hash of the python
+              source of each module pcmodule imports, directly or indirectly
+    """
+    dependencies = []
+    seen = {id(pcmodule): 1}
+    pending = pcmodule.modules.values()
+    while pending:
+        module = pending.pop()
+        if seen.has_key(id(module)):
+            continue
+        seen[id(module)] = 1
+        pending.extend(module.modules.values())
+
+        filename = module.filename()
+        if filename[-3:] != '.py':
+            continue
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            continue
+        digest = _hashFile(filename)
+        if digest is not None:
+            dependencies.append((filename, mtime, digest))
+    return dependencies
+
+def _makeDirectory(directory):
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+    except OSError:
+        # possibly created by a concurrent run
+        pass
+
+def _dump(data, directory, path):
+    """
+    Write to a temporary file and rename it, so concurrent runs never read
+    a partially written file.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=directory)
+    f = os.fdopen(fd, 'wb')
+    try:
+        getPickler(f).dump(data)
+    finally:
+        f.close()
+    os.rename(tmp, path)
+
+
+class ResultCache:
+    """
+    Warnings for modules, stored as one pickled file per module in a
+    directory.  The least recently used entries are removed when there
+    are more than size of them.
+
+    @ivar directory: the directory holding the entries
+    @type directory: str
+    @ivar size:      the maximum number of entries to keep
+    @type size:      int
+    """
+
+    def __init__(self, directory, size, cfg, suppressions=None):
+        """
+        @type  cfg:          L{Config.Config}
+        @param suppressions: tuple of suppressions, suppressionRegexs dicts
+        """
+        self.directory = os.path.expanduser(directory)
+        self.size = size
+        self._fingerprint = _getKey(cfg, suppressions)
+        self._only = cfg.only
+        self._files = cfg.files
+
+    def _getPath(self, file):
+        """
+        @param file: the file as given to check
+        @type  file: str
+
+        @rtype: str or None if file can not be cached
+        """
+        if file[-3:] != '.py':
+            return None
+        digest = _hashFile(file)
+        if digest is None:
+            return None
+        named = ''
+        if self._only:
+            # --only drops the warnings for files which were not given
+            named = str(self._files.has_key(os.path.abspath(file)))
+        key = '\0'.join((self._fingerprint, file, digest, named))
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def get(self, file):
+        """
+        @param file: the file as given to check
+        @type  file: str
+
+        @rtype: list of L{Warning.Warning} or None if not cached
+        """
+        path = self._getPath(file)
+        if path is None:
+            return None
+
+        try:
+            f = open(path, 'rb')
+            try:
+                dependencies, warnings = getUnpickler(f).load()
+            finally:
+                f.close()
+        except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+            return None
+
+        for filename, mtime, digest in dependencies:
+            try:
+                if os.path.getmtime(filename) == mtime:
+                    continue
+            except OSError:
+                pass
+            if _hashFile(filename) != digest:
+                utils.debug('cache: %s changed, checking %s', filename, file)
+                return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        utils.debug('cache: using %d warnings for %s', len(warnings), file)
+        return warnings
+
+    def put(self, file, pcmodule, warnings):
+        """
+        @param file:     the file as given to check
+        @type  file:     str
+        @param pcmodule: the module loaded from file
+        @type  pcmodule: L{pcmodules.PyCheckerModule}
+        @param warnings: the warnings found in pcmodule
+        @type  warnings: list of L{Warning.Warning}
+        """
+        path = self._getPath(file)
+        if path is None:
+            return
+
+        dependencies = _getDependencies(pcmodule)
+
+        _makeDirectory(self.directory)
+        try:
+            _dump((dependencies, warnings), self.directory, path)
+        except (IOError, OSError), e:
+            utils.debug('cache: could not store %s: %s', file, e)
+            return
+
+        utils.debug('cache: stored %d warnings for %s', len(warnings), file)
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries over the size.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_TMP_PREFIX) or name.startswith(_GRAPH_PREFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+
+        if len(entries) <= self.size:
+            return
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.size]:
+            try:
+                os.remove(path)
+            except OSError:
+                # already removed by a concurrent run
+                pass
+
+    def save(self):
+        """
+        Entries are written as they are put, so there is nothing to do.
+        """
+        pass
+
+
+class ImportGraph:
+    """
+    The modules loaded in previous runs, with the modules they import and
+    the warnings found for the ones that were checked, stored in one file.
+
+    @ivar directory: the directory holding the file
+    @type directory: str
+    @ivar nodes:     absolute filename ->
+                     (mtime, hash, imported filenames, warnings or None)
+    @type nodes:     dict of str -> tuple
+    @ivar invalid:   the filenames which changed, or import one which did
+    @type invalid:   dict of str -> 1
+    """
+
+    def __init__(self, directory, cfg, suppressions=None):
+        """
+        @type  cfg:          L{Config.Config}
+        @param suppressions: tuple of suppressions, suppressionRegexs dicts
+        """
+        self.directory = os.path.expanduser(directory)
+        # the files given are not part of the key, so runs on any of the
+        # files share one graph
+        key = _getKey(cfg, suppressions)
+        self._only = cfg.only
+        self._files = cfg.files
+        self._path = os.path.join(self.directory,
+                                  _GRAPH_PREFIX + hashlib.sha1(key).hexdigest())
+        self.nodes = self._load()
+        self.invalid = self._getInvalid()
+        self._added = {}
+
+    def _load(self):
+        try:
+            f = open(self._path, 'rb')
+            try:
+                return getUnpickler(f).load()
+            finally:
+                f.close()
+        except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+            return {}
+
+    def _changed(self, filename, node):
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            return 1
+        if mtime == node[0]:
+            return 0
+        return _hashFile(filename) != node[1]
+
+    def _getInvalid(self):
+        importers = {}
+        for filename, node in self.nodes.items():
+            for dependency in node[2]:
+                importers.setdefault(dependency, []).append(filename)
+
+        invalid = {}
+        pending = []
+        for filename, node in self.nodes.items():
+            if self._changed(filename, node):
+                pending.append(filename)
+        while pending:
+            filename = pending.pop()
+            if not invalid.has_key(filename):
+                invalid[filename] = 1
+                pending.extend(importers.get(filename, []))
+
+        utils.debug('cache: %d of %d modules changed or import changes',
+            len(invalid), len(self.nodes))
+        return invalid
+
+    def get(self, file):
+        """
+        @param file: the file as given to check
+        @type  file: str
+
+        @rtype: list of L{Warning.Warning} or None if it must be checked
+        """
+        filename = os.path.abspath(file)
+        # warnings are only stored for the files given, which --only keeps
+        if self._only and not self._files.has_key(filename):
+            return None
+        node = self.nodes.get(filename)
+        if node is None or node[3] is None or self.invalid.has_key(filename):
+            return None
+        return node[3]
+
+    def put(self, file, pcmodule, warnings):
+        """
+        @param file:     the file as given to check
+        @type  file:     str
+        @param pcmodule: the module loaded from file
+        @type  pcmodule: L{pcmodules.PyCheckerModule}
+        @param warnings: the warnings found in pcmodule
+        @type  warnings: list of L{Warning.Warning}
+        """
+        self._addNode(pcmodule, warnings)
+
+    def _addNode(self, pcmodule, warnings=None):
+        """
+        Add the node for pcmodule and the modules it imports.
+
+        @rtype: str or None if pcmodule has no python source
+        """
+        filename = pcmodule.filename()
+        if filename[-3:] != '.py':
+            return None
+        filename = os.path.abspath(filename)
+        if warnings is None and self._added.has_key(filename):
+            return filename
+        self._added[filename] = 1
+
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            return None
+        digest = _hashFile(filename)
+
+        dependencies = []
+        for module in pcmodule.modules.values():
+            dependency = self._addNode(module)
+            if dependency is not None:
+                dependencies.append(dependency)
+
+        # keep the warnings of a module checked before, unless it changed
+        if warnings is None:
+            old = self.nodes.get(filename)
+            if old is not None and old[1] == digest and \
+               not self.invalid.has_key(filename):
+                warnings = old[3]
+
+        self.nodes[filename] = (mtime, digest, dependencies, warnings)
+        return filename
+
+    def save(self):
+        _makeDirectory(self.directory)
+        try:
+            _dump(self.nodes, self.directory, self._path)
+        except (IOError, OSError), e:
+            utils.debug('cache: could not store import graph: %s', e)
@@ -13,9 +13,12 @@ This module is the main entry point for using pychecker as a module.
 import string
 import types
 import sys
-import imp
 import os
 import glob
+import copy
+import heapq
+import cStringIO
+import tempfile
 
 from pychecker import utils
 from pychecker import printer
@@ -25,6 +28,9 @@ from pychecker import Config
 from pychecker import function
 from pychecker import msgs
 from pychecker import pcmodules
+from pychecker import cache
+from pychecker import stats
+from pychecker import trace
 from pychecker.Warning import Warning
 
 _cfg = None
@@ -111,12 +117,6 @@ def getAllPCModules():
 
     return modules
 
-_BUILTIN_MODULE_ATTRS = { 'sys': [ 'ps1', 'ps2', 'tracebacklimit', 
-                                   'exc_type', 'exc_value', 'exc_traceback',
-                                   'last_type', 'last_value', 'last_traceback',
-                                 ],
-                        }
-
 def fixupBuiltinModules(needs_init=0):
     for moduleName in sys.builtin_module_names :
         # Skip sys since it will reset sys.stdout in IDLE and cause
@@ -130,32 +130,201 @@ def fixupBuiltinModules(needs_init=0):
         # builtin modules don't have a moduleDir
         module = pcmodules.getPCModule(moduleName)
         if module is not None :
-            try :
-                m = imp.init_builtin(moduleName)
-            except ImportError :
-                pass
-            else :
-                extra_attrs = _BUILTIN_MODULE_ATTRS.get(moduleName, [])
-                module.attributes = [ '__dict__' ] + dir(m) + extra_attrs
+            module.setupBuiltinAttributes()
+
+
+class _WarningWriter:
+    """
+    Write sorted warnings, possibly over several calls, skipping
+    duplicates and separating the warnings of different files.
+
+    @ivar lastWarning: the last warning written
+    @type lastWarning: L{Warning} or None
+    @ivar written:     the warnings written, by their duplicate key
+    @type written:     dict of tuple -> L{Warning}
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lastWarning = None
+        self.written = {}
+
+    def write(self, warnings):
+        """
+        @type  warnings: iterable of L{Warning}
+
+        @rtype:   int
+        @returns: the number of warnings written
+        """
+        written = 0
+        for warning in warnings :
+            # ignore duplicate warnings, which can be found for
+            # different modules when streaming
+            key = warn._getDuplicateKey(warning)
+            if self.written.has_key(key):
+                continue
+            self.written[key] = warning
+
+            # print blank line between files
+            if self.lastWarning is not None and \
+               self.lastWarning.file != warning.file:
+                self.stream.write("\n")
+
+            self.lastWarning = warning
+            warning.output(self.stream, removeSysPath=True)
+            written = written + 1
+        return written
+
+    def unwritten(self, warnings):
+        """
+        @type  warnings: list of L{Warning}
 
+        @rtype:   list of L{Warning}
+        @returns: the warnings which are not duplicates of those written
+        """
+        return [warning for warning in warnings
+                if not self.written.has_key(warn._getDuplicateKey(warning))]
 
 def _printWarnings(warnings, stream=None):
     if stream is None:
         stream = sys.stdout
     
     warnings.sort()
-    lastWarning = None
-    for warning in warnings :
-        if lastWarning is not None:
-            # ignore duplicate warnings
-            if cmp(lastWarning, warning) == 0:
-                continue
-            # print blank line between files
-            if lastWarning.file != warning.file:
-                stream.write("\n")
+    _WarningWriter(stream).write(warnings)
+
+class _WarningRuns:
+    """
+    Sorted lists of warnings stored in a temporary file, to merge them
+    without keeping them all in memory.
+
+    @ivar runs: the offset in the file and the number of warnings of each
+    @type runs: list of (int, int)
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.runs = []
+
+    def add(self, warnings):
+        """
+        @param warnings: sorted warnings
+        @type  warnings: list of L{Warning}
+        """
+        if not warnings:
+            return
+        self.file.seek(0, 2)
+        self.runs.append((self.file.tell(), len(warnings)))
+        pickler = cache.getPickler(self.file)
+        for warning in warnings:
+            pickler.clear_memo()
+            pickler.dump(warning)
+
+    def _read(self, offset, count):
+        for i in range(count):
+            self.file.seek(offset)
+            warning = cache.getUnpickler(self.file).load()
+            # other runs are read from the same file in between
+            offset = self.file.tell()
+            yield warning
+
+    def merge(self):
+        """
+        @rtype: iterator of L{Warning}
+        @returns: the warnings of all runs, sorted
+        """
+        return heapq.merge(*[self._read(offset, count)
+                             for offset, count in self.runs])
+
+    def close(self):
+        self.file.close()
+
+def _printByModule(moduleWarnings, cfg, stream=None):
+    """
+    Print warnings as they are found.  With cfg.streamSorted, the warnings
+    of every module are stored and merged at the end to print them in the
+    same order and with the same limit as _printWarnings.  Otherwise they
+    are printed module by module, and the limit is on the number printed.
+
+    @param moduleWarnings: the warnings from importing each file, which
+                           are not limited, or the sorted warnings of
+                           each module
+    @type  moduleWarnings: iterable of tuple of (list of L{Warning},
+                                                 list of L{Warning})
+    @type  cfg:            L{Config.Config}
+
+    @rtype:   int
+    @returns: the number of warnings found
+    """
+    if stream is None:
+        stream = sys.stdout
 
+    if not cfg.streamSorted:
+        writer = _WarningWriter(stream)
+        found = printed = ignored = 0
+        for importWarnings, warnings in moduleWarnings:
+            found = found + writer.write(_sortUnique(importWarnings))
+            # duplicates are not counted for the limit
+            warnings = writer.unwritten(warnings)
+            if cfg.limit:
+                left = max(cfg.limit - printed, 0)
+                ignored = ignored + len(warnings[left:])
+                warnings = warnings[:left]
+            printed = printed + writer.write(warnings)
+        if ignored:
+            stream.write("\n")
+            Warning('', 0, msgs.TOO_MANY_WARNINGS % ignored).output(stream)
+        return found + printed + ignored
+
+    runs = _WarningRuns()
+    try:
+        importWarnings = []
+        for fileImportWarnings, warnings in moduleWarnings:
+            importWarnings.extend(fileImportWarnings)
+            runs.add(warnings)
+        merged = _unique(runs.merge())
+
+        if cfg.limit:
+            # keep the most severe warnings on a heap, like limitWarnings
+            counted = _Counter(merged)
+            warnings = heapq.nlargest(cfg.limit, counted, warn._severityKey)
+            if counted.count > cfg.limit:
+                msg = msgs.TOO_MANY_WARNINGS % (counted.count - cfg.limit)
+                warnings.append(Warning('', 0, msg))
+            warnings = importWarnings + warnings
+            _printWarnings(warnings, stream)
+            return len(warnings)
+
+        return _WarningWriter(stream).write(
+            heapq.merge(_sortUnique(importWarnings), merged))
+    finally:
+        runs.close()
+
+def _sortUnique(warnings):
+    return warn._sortUnique(warnings[:])
+
+def _unique(warnings):
+    """
+    Generate the sorted warnings, skipping duplicates.
+    """
+    lastWarning = None
+    for warning in warnings:
+        if lastWarning is None or cmp(lastWarning, warning) != 0:
+            yield warning
         lastWarning = warning
-        warning.output(stream, removeSysPath=True)
+
+class _Counter:
+    """
+    Iterate over warnings, counting them.
+    """
+
+    def __init__(self, warnings):
+        self.warnings = warnings
+        self.count = 0
+
+    def __iter__(self):
+        for warning in self.warnings:
+            self.count = self.count + 1
+            yield warning
 
 
 class NullModule:
@@ -224,9 +393,13 @@ def processFiles(files, cfg=None, pre_process_cb=None):
         oldsyspath = sys.path[:]
         if moduleDir is not None:
             sys.path.insert(0, moduleDir)
+        if stats.enabled:
+            started = stats.start()
         pcmodule = pcmodules.PyCheckerModule(moduleName, moduleDir=moduleDir)
         loaded = pcmodule.load()
         sys.path = oldsyspath
+        if stats.enabled:
+            stats.addPhase('import', started, moduleName)
 
         if not loaded:
             w = Warning(pcmodule.filename(), 1,
@@ -274,13 +447,212 @@ def _mightBeSiblingModule(module):
 
 # grooming this to be public API to use pychecker as a module
 def _check(files, cfg=None, suppressions=None, printProcessing=False):
+    if cfg is not None and cfg.jobs > 1 and len(files) > 1:
+        warnings = _checkParallel(files, cfg, suppressions, printProcessing)
+        if warnings is not None:
+            return warnings
+
+    importWarnings, warnings = _checkFiles(files, cfg, suppressions,
+                                           printProcessing)
+    return importWarnings + warnings
+
+def _checkByModule(files, cfg, suppressions=None, printProcessing=False):
+    """
+    Check the given files one by one, generating the warnings from
+    importing each file, and then the sorted warnings of each module
+    loaded because of it, in the order of their file names, as soon as it
+    is checked.  The limit of warnings is not applied.
+
+    @type  cfg: L{Config.Config}
+
+    @rtype: generator of tuple of (list of L{Warning}, list of L{Warning})
+    @returns: the warnings from importing, and the warnings of a module
+    """
+    if cfg.jobs > 1 or cfg.cacheDir or cfg.incremental:
+        # all files are checked before any of the warnings are known
+        allCfg = copy.copy(cfg)
+        allCfg.limit = 0
+        yield [], warn._sortUnique(
+            _check(files, allCfg, suppressions, printProcessing))
+        return
+
+    utils.initConfig(cfg)
+    try:
+        for file in files:
+            importWarnings, newPCModules = _loadFiles([file], cfg,
+                                                      printProcessing)
+            yield importWarnings, []
+
+            newPCModules.sort(key=_getFilename)
+            for pcmodule, warnings in warn.findByModule(newPCModules, cfg,
+                                                        suppressions):
+                yield [], warnings
+    finally:
+        utils.popConfig()
+
+def _getFilename(pcmodule):
+    return pcmodule.filename()
+
+def _checkShard(args):
+    """
+    Check a shard of the files in a worker process.
+
+    Warnings are pickled with L{cache.getPickler}, as the pool would lose
+    the identity of their messages, and the output is kept for the parent
+    to write in the order of the shards.
+
+    @type  args: tuple of (list of str, L{Config.Config}, tuple, bool)
+
+    @rtype:   str
+    @returns: the pickled warnings from importing, the warnings from
+              checking, the timing recorded for --stats or None, and the
+              output and error output of the worker
+    """
+    files, cfg, suppressions, printProcessing = args
+    # the worker starts with what the parent recorded before forking
+    if stats.enabled:
+        stats.reset()
+    if trace.enabled:
+        trace.split(os.getpid())
+
+    stdout, stderr = sys.stdout, sys.stderr
+    output, errors = cStringIO.StringIO(), cStringIO.StringIO()
+    sys.stdout, sys.stderr = output, errors
+    try:
+        importWarnings, warnings = _checkFiles(files, cfg, suppressions,
+                                               printProcessing)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+    data = None
+    if stats.enabled:
+        data = stats.getData()
+    return cache.dumps((importWarnings, warnings, data,
+                        output.getvalue(), errors.getvalue()))
+
+def _checkParallel(files, cfg, suppressions, printProcessing):
+    """
+    Check the files in cfg.jobs worker processes, each one loading and
+    checking a contiguous shard of the files.
+
+    @rtype: list of L{Warning} or None if processes are not available
+    """
+    try:
+        import multiprocessing
+    except ImportError:
+        return None
+
+    # the limit must apply to the merged warnings, as it does when
+    # checking all files in one process
+    workerCfg = copy.copy(cfg)
+    workerCfg.jobs = 1
+    workerCfg.limit = 0
+
+    jobs = min(cfg.jobs, len(files))
+    size = (len(files) + jobs - 1) / jobs
+    shards = []
+    for i in range(0, len(files), size):
+        shards.append((files[i:i + size], workerCfg, suppressions,
+                       printProcessing))
+
+    utils.debug('main: Checking %d files in %d processes',
+        len(files), len(shards))
+    if trace.enabled:
+        trace.flush()
+    pool = multiprocessing.Pool(len(shards), maxtasksperchild=1)
+    try:
+        results = pool.map(_checkShard, shards, 1)
+    finally:
+        pool.close()
+        pool.join()
+
+    importWarnings, warnings = [], []
+    for result in results:
+        shardImportWarnings, shardWarnings, data, output, errors = \
+            cache.loads(result)
+        sys.stdout.write(output)
+        sys.stderr.write(errors)
+        importWarnings.extend(shardImportWarnings)
+        warnings.extend(shardWarnings)
+        if data is not None:
+            stats.merge(data)
+
+    if cfg.limit:
+        warn.limitWarnings(warnings, cfg.limit)
+
+    return importWarnings + warnings
+
+def _checkFiles(files, cfg=None, suppressions=None, printProcessing=False):
+    """
+    Load and check the given files in this process.
+
+    @rtype: tuple of (list of L{Warning}, list of L{Warning})
+    @returns: the warnings from importing and the warnings from checking
+    """
+    utils.initConfig(cfg)
+
+    resultCache = None
+    if cfg is not None and cfg.incremental:
+        resultCache = cache.ImportGraph(
+            cfg.cacheDir or cache.DEFAULT_DIRECTORY, cfg, suppressions)
+    elif cfg is not None and cfg.cacheDir:
+        resultCache = cache.ResultCache(cfg.cacheDir, cfg.cacheSize, cfg,
+                                        suppressions)
+    if resultCache is not None:
+        cachedWarnings = []
+        uncachedFiles = []
+        for file in files:
+            found = resultCache.get(file)
+            if found is None:
+                uncachedFiles.append(file)
+            else:
+                cachedWarnings.extend(found)
+        files = uncachedFiles
+
+        # the limit must apply to the cached warnings as well
+        limit = cfg.limit
+        cfg = copy.copy(cfg)
+        cfg.limit = 0
+
+    importWarnings, newPCModules = _loadFiles(files, cfg, printProcessing)
+
+    utils.debug('main: Finding warnings')
+    # suppressions is a tuple of suppressions, suppressionRegexs dicts
+    if resultCache is None:
+        warnings = warn.find(newPCModules, cfg, suppressions)
+    else:
+        warnings = _findAndStoreWarnings(resultCache, files, newPCModules,
+                                         cfg, suppressions)
+
+    utils.debug('main: Found %d warnings in %d files and %d modules',
+        len(importWarnings) + len(warnings), len(files), len(newPCModules))
+
+    if resultCache is not None:
+        resultCache.save()
+        warnings = cachedWarnings + warnings
+        if limit:
+            warn.limitWarnings(warnings, limit)
+
+    # FIXME: any way to assert we are popping the one we pushed ?
+    utils.popConfig()
+
+    return importWarnings, warnings
+
+def _loadFiles(files, cfg, printProcessing=False):
+    """
+    Load the given files, and the modules they import.
+
+    @rtype: tuple of (list of L{Warning},
+                      list of L{pcmodules.PyCheckerModule})
+    @returns: the warnings from importing and the modules loaded because
+              of these files
+    """
     # snapshot modules before and after processing, so that we only warn
     # about the modules loaded because of these files.
     # preferable to clearing the loaded modules because we don't have to
     # reprocess previously handled modules
     beforePCModules = getAllPCModules()
     beforeModules = dict(sys.modules.items())
-    utils.initConfig(cfg)
 
     utils.debug('main: Checking %d files', len(files))
     utils.debug('main: Finding import warnings')
@@ -289,7 +661,11 @@ def _check(files, cfg=None, suppressions=None, printProcessing=False):
     utils.debug('main: Found %d import warnings' % len(importWarnings))
     utils.debug('main: %d modules in sys.modules' % len(sys.modules.keys()))
 
+    if stats.enabled:
+        started = stats.start()
     fixupBuiltinModules()
+    if stats.enabled:
+        stats.addPhase('fixupBuiltinModules', started)
 
     afterPCModules = getAllPCModules()
 
@@ -316,14 +692,33 @@ def _check(files, cfg=None, suppressions=None, printProcessing=False):
             utils.debug('main: unloading python module %s', v)
             del sys.modules[k]
 
-    utils.debug('main: Finding warnings')
-    # suppressions is a tuple of suppressions, suppressionRegexs dicts
-    warnings = warn.find(newPCModules, cfg, suppressions)
+    return importWarnings, newPCModules
 
-    utils.debug('main: Found %d warnings in %d files and %d modules',
-        len(importWarnings) + len(warnings), len(files), len(newPCModules))
+def _findAndStoreWarnings(resultCache, files, pcmodules, cfg, suppressions):
+    """
+    Find the warnings module by module, storing those for each of the
+    files in the cache.
 
-    # FIXME: any way to assert we are popping the one we pushed ?
-    utils.popConfig()
+    @type  resultCache: L{cache.ResultCache} or L{cache.ImportGraph}
+    @param pcmodules:   the modules loaded while checking files
+    @type  pcmodules:   list of L{pcmodules.PyCheckerModule}
 
-    return importWarnings + warnings
+    @rtype: list of L{Warning}
+    """
+    filesByName = {}
+    for file in files:
+        filesByName[os.path.abspath(file)] = file
+
+    warnings = []
+    # warnings can be for other files, like a base class in another
+    # module, so tell which module they belong to by checking one by one
+    for pcmodule, moduleWarnings in warn.findByModule(pcmodules, cfg,
+                                                      suppressions):
+        warnings.extend(moduleWarnings)
+
+        if pcmodule.module is not None:
+            file = filesByName.get(os.path.abspath(pcmodule.filename()))
+            if file is not None:
+                resultCache.put(file, pcmodule, moduleWarnings)
+
+    return warnings
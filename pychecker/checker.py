@@ -130,6 +130,18 @@ def main(argv) :
     global _cfg
     _cfg, files, suppressions = Config.setupFromArgs(argv[1:])
     utils.initConfig(_cfg)
+
+    if _cfg.connect :
+        from pychecker import server
+        return server.connect(_cfg.connect, argv[1:])
+
+    if _cfg.server :
+        # insert this here, so we find files in the local dir
+        sys.path.insert(0, '')
+        from pychecker import server
+        server.serve(_cfg.server)
+        return 0
+
     if not files :
         return 0
 
@@ -140,15 +152,64 @@ def main(argv) :
     # insert this here, so we find files in the local dir before std library
     sys.path.insert(0, '')
 
+    if _cfg.stats :
+        from pychecker import stats
+        stats.enable()
+    if _cfg.debug or _cfg.traceFile :
+        from pychecker import trace
+        trace.enable(_cfg.traceFile, _cfg.debug)
+
+    status = _checkAndPrint(files, suppressions)
+
+    if _cfg.debug or _cfg.traceFile :
+        trace.disable()
+    if _cfg.stats :
+        stats.report(sys.stderr)
+        if _cfg.statsFile :
+            stats.dump(_cfg.statsFile)
+        stats.disable()
+    return status
+
+def _checkAndPrint(files, suppressions):
+    """
+    Check the files and print the warnings.
+
+    @rtype:   int
+    @returns: the exit status
+    """
     # import here, because sys.path is not set up at the top for pychecker dir
     from pychecker import check
+    from pychecker import stats
+    if _cfg.stream or _cfg.streamSorted:
+        moduleWarnings = check._checkByModule(files,
+            cfg=_cfg,
+            suppressions=suppressions, printProcessing=True)
+        if not _cfg.quiet :
+            print "\nWarnings...\n"
+        # loading and checking the modules is part of the output phase here
+        if stats.enabled :
+            started = stats.start()
+        found = check._printByModule(moduleWarnings, _cfg)
+        if stats.enabled :
+            stats.addPhase('output', started)
+        if found:
+            return 1
+
+        if not _cfg.quiet :
+            print "None"
+        return 0
+
     warnings = check._check(files,
         cfg=_cfg,
         suppressions=suppressions, printProcessing=True)
     if not _cfg.quiet :
         print "\nWarnings...\n"
     if warnings:
+        if stats.enabled :
+            started = stats.start()
         _printWarnings(warnings)
+        if stats.enabled :
+            stats.addPhase('output', started)
         return 1
 
     if not _cfg.quiet :
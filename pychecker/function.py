@@ -8,13 +8,98 @@ Object to hold information about functions.
 Also contain a pseudo Python function object
 """
 
+import types
 import string
 
 _ARGS_ARGS_FLAG = 4
 _KW_ARGS_FLAG = 8
 _CO_FLAGS_MASK = _ARGS_ARGS_FLAG + _KW_ARGS_FLAG
 
-class _ReturnValues:
+class _Signature(object):
+    """
+    What the code of a function tells about its arguments.
+
+    @ivar argCount:   the number of positional arguments
+    @type argCount:   int
+    @ivar names:      the names of all arguments, including the *args and
+                      **kwargs ones
+    @type names:      tuple of str
+    @ivar positions:  argument name -> index in names
+    @type positions:  dict of str -> int
+    @ivar varArgName: the name of the *args argument, if any
+    @type varArgName: str or None
+    @ivar supportsKW: whether there is a **kwargs argument
+    @type supportsKW: int (used as bool)
+    """
+
+    __slots__ = ('argCount', 'names', 'positions', 'varArgName',
+                 'supportsKW')
+
+    def __init__(self, func_code):
+        # see http://docs.python.org/reference/datamodel.html#types
+        # for more info on func_code
+        # co_argcount is the number of positional arguments (including
+        # arguments with default values)
+        self.argCount = numArgs = func_code.co_argcount
+        try:
+            # co_flags is an integer encoding a number of flags for the
+            # interpreter.
+            flags = func_code.co_flags
+        except AttributeError:
+            # this happens w/Zope
+            flags = 0
+        # co_varnames is a tuple containing the names of the local variables
+        # (starting with the argument names)
+        self.varArgName = None
+        if flags & _ARGS_ARGS_FLAG != 0:
+            # co_varnames has the name of the *args variable after the
+            # positional arguments
+            self.varArgName = func_code.co_varnames[numArgs]
+            numArgs = numArgs + 1
+        self.supportsKW = flags & _KW_ARGS_FLAG
+        if self.supportsKW:
+            # co_varnames has the name of the **kwargs variable after the
+            # positional arguments and *args variable
+            numArgs = numArgs + 1
+        # FIXME: a generator seems to have .0 as the first member here,
+        #        and then the generator variable as the second.
+        #        should we special-case that here ?
+        self.names = func_code.co_varnames[:numArgs]
+        self.positions = {}
+        for i in range(len(self.names) - 1, -1, -1):
+            self.positions[self.names[i]] = i
+
+# code object id -> (code object, L{_Signature});
+# keeping the code object alive makes sure its id is not reused
+_signatures = {}
+
+def _getSignature(func_code):
+    """
+    The signature is worked out once per code object.  A L{FakeCode} can
+    have varnames of its own and is seldom shared, so it is not cached.
+
+    @type  func_code: L{types.CodeType} or L{FakeCode}
+
+    @rtype: L{_Signature}
+    """
+    if type(func_code) is not types.CodeType:
+        return _Signature(func_code)
+    entry = _signatures.get(id(func_code))
+    if entry is not None and entry[0] is func_code:
+        return entry[1]
+
+    signature = _Signature(func_code)
+    _signatures[id(func_code)] = (func_code, signature)
+    return signature
+
+def clearSignatures():
+    """
+    Forget the signatures, which keep their code objects alive.
+    They are worked out again when needed.
+    """
+    _signatures.clear()
+
+class _ReturnValues(object):
     """
     I am a base class that can track return values.
 
@@ -22,6 +107,8 @@ class _ReturnValues:
                                   index to next instruction)
     @type returnValues: tuple of (int, L{pychecker.Stack.Item}, int)
     """
+
+    __slots__ = ('returnValues', )
     def __init__(self):
         self.returnValues = None
 
@@ -40,7 +127,12 @@ class _ReturnValues:
         return returnValues[-1][1].isImplicitNone()
 
 class FakeCode :
-    "This is a holder class for code objects (so we can modify them)"
+    """
+    This is a holder class for code objects (so we can modify them)
+
+    @ivar realCode: the code object being held
+    @type realCode: L{types.CodeType}
+    """
     def __init__(self, code, varnames = None) :
         """
         @type  code: L{types.CodeType}
@@ -50,6 +142,7 @@ class FakeCode :
                 setattr(self, attr, getattr(code, attr))
             except:
                 pass
+        self.realCode = getattr(code, 'realCode', code)
         if varnames is not None:
             self.co_varnames = varnames
 
@@ -93,8 +186,14 @@ class Function(_ReturnValues):
     @type maxArgs:    int or None
     @ivar supportsKW: whether the function supports keyword arguments.
     @type supportsKW: int (used as bool)
+    @ivar signature:  the arguments of the function, shared by the functions
+                      with the same code
+    @type signature:  L{_Signature}
     """
 
+    __slots__ = ('function', 'isMethod', 'minArgs', 'maxArgs', 'supportsKW',
+                 'signature')
+
     def __init__(self, function, isMethod=0):
         """
         @param function: the function to wrap
@@ -107,24 +206,17 @@ class Function(_ReturnValues):
 
         self.function = function
         self.isMethod = isMethod
-        # co_argcount is the number of positional arguments (including
-        # arguments with default values)
-        self.minArgs = self.maxArgs = function.func_code.co_argcount
+        self.signature = signature = _getSignature(function.func_code)
+        self.minArgs = self.maxArgs = signature.argCount
         # func_defaults is a tuple containing default argument values for those
         # arguments that have defaults, or None if no arguments have a default
         # value
         if function.func_defaults is not None:
             self.minArgs = self.minArgs - len(function.func_defaults)
         # if function uses *args, there is no max # args
-        try:
-            # co_flags is an integer encoding a number of flags for the
-            # interpreter.
-            if function.func_code.co_flags & _ARGS_ARGS_FLAG != 0:
-                self.maxArgs = None
-            self.supportsKW = function.func_code.co_flags & _KW_ARGS_FLAG
-        except AttributeError:
-            # this happens w/Zope
-            self.supportsKW = 0
+        if signature.varArgName is not None:
+            self.maxArgs = None
+        self.supportsKW = signature.supportsKW
 
     def __str__(self):
         return self.function.func_name
@@ -141,26 +233,8 @@ class Function(_ReturnValues):
         @returns: a list of argument names to this function
         @rtype:   list of str
         """
-        # see http://docs.python.org/reference/datamodel.html#types
-        # for more info on func_code
-        # co_argcount is the number of positional arguments (including
-        # arguments with default values)
-        numArgs = self.function.func_code.co_argcount
-        if self.maxArgs is None:
-            # co_varnames has the name of the *args variable after the
-            # positional arguments
-            numArgs = numArgs + 1
-        if self.supportsKW:
-            # co_varnames has the name of the **kwargs variable after the
-            # positional arguments and *args variable
-            numArgs = numArgs + 1
-        # co_varnames is a tuple containing the names of the local variables
-        # (starting with the argument names)
-        # FIXME: a generator seems to have .0 as the first member here,
-        #        and then the generator variable as the second.
-        #        should we special-case that here ?
-        return self.function.func_code.co_varnames[:numArgs]
-        
+        return self.signature.names
+
     def isParam(self, name):
         """
         @type  name: str
@@ -169,7 +243,21 @@ class Function(_ReturnValues):
                   function
         @rtype:   bool
         """
-        return name in self.arguments()
+        return self.argumentIndex(name) >= 0
+
+    def argumentIndex(self, name):
+        """
+        @type  name: str
+
+        @returns: the index of the argument with the given name in
+                  L{arguments}, or -1 if there is none
+        @rtype:   int
+        """
+        try:
+            return self.signature.positions.get(name, -1)
+        except TypeError:
+            # not hashable, so not a name
+            return -1
 
     def isStaticMethod(self):
         return self.isMethod and isinstance(self.function, type(create_fake))
@@ -187,10 +275,8 @@ class Function(_ReturnValues):
         @returns: the default value for the function parameter with the given
                   name.
         """
-        func_code = self.function.func_code
-        arg_names = list(func_code.co_varnames[:func_code.co_argcount])
-        i = arg_names.index(name)
-        if i < self.minArgs:
+        i = self.argumentIndex(name)
+        if i < self.minArgs or i >= self.signature.argCount:
             raise ValueError
         return self.function.func_defaults[i - self.minArgs]
 
@@ -199,10 +285,7 @@ class Function(_ReturnValues):
         @returns: the name of the *args parameter of the function.
         @rtype:   str
         """
-        if self.maxArgs is not None:
-            return None
-        func_code = self.function.func_code
-        return func_code.co_varnames[func_code.co_argcount]
+        return self.signature.varArgName
 
 def create_fake(name, code, func_globals = {}, varnames = None) :
     return Function(FakeFunction(name, code, func_globals, varnames))
@@ -47,9 +47,14 @@ class Deprecated(WarningClass):
 class Style(WarningClass):
   level = 10
 
+class Notice(WarningClass):
+  level = 5
+
 TOO_MANY_WARNINGS = WarningClass("%d errors suppressed, use -#/--limit to increase the number of errors displayed")
 CHECKER_BROKEN = Internal("INTERNAL ERROR -- STOPPED PROCESSING FUNCTION --\n\t%s")
 INVALID_CHECKER_ARGS = Internal("Invalid warning suppression arguments --\n\t%s")
+ANALYSIS_TRUNCATED = Notice("Stopped checking function (%s) after %d instructions and %d ms, use maxinstructions/maxmilliseconds to change the limits")
+MODULE_ANALYSIS_TRUNCATED = Notice("Stopped checking module (%s) after %d ms, use maxmodulemilliseconds to change the limit")
 
 NO_MODULE_DOC = Style("No module doc string")
 NO_CLASS_DOC = Style("No doc string for class %s")
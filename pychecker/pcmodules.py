@@ -13,7 +13,7 @@ import imp
 import types
 import string
 
-from pychecker import utils, function, Config, OP
+from pychecker import utils, function, Config, OP, static
 
 # Constants
 _DEFAULT_MODULE_TOKENS = ('__builtins__', '__doc__', '__file__', '__name__',
@@ -40,6 +40,13 @@ EVIL_C_OBJECTS = {
     'wx._misc.TheClipboard': None,
   }
 
+# attributes of builtin modules which are only set later on
+_BUILTIN_MODULE_ATTRS = { 'sys': [ 'ps1', 'ps2', 'tracebacklimit',
+                                   'exc_type', 'exc_value', 'exc_traceback',
+                                   'last_type', 'last_value', 'last_traceback',
+                                 ],
+                        }
+
 
 __pcmodules = {} # dict of
                  # (fully qualified module name, moduleDir)
@@ -98,6 +105,182 @@ class Variable:
 
     __repr__ = utils.std_repr
 
+# id of class object -> _ClassModel, for all class objects seen so far
+_classModels = {}
+
+def getClassModel(classObject):
+    """
+    @rtype: L{_ClassModel}
+    @returns: the model of the class object, made once
+    """
+    model = _classModels.get(id(classObject))
+    if model is None or model.classObject is not classObject:
+        model = _ClassModel(classObject)
+        _classModels[id(classObject)] = model
+    return model
+
+def _findMembers(method, members):
+    """
+    Add the attributes set on the method's self argument to members.
+
+    @type members: dict of str -> type or None
+    """
+    if not hasattr(method, 'func_code') :
+        return
+
+    func_code = method.func_code
+    instructions = OP.getInstructions(func_code)
+    stack = []
+    for i in range(len(instructions)) :
+        op = instructions.ops[i]
+        if op >= OP.HAVE_ARGUMENT :
+            operand = instructions.operands[i]
+            if OP.LOAD_CONST(op) or OP.LOAD_FAST(op) or OP.LOAD_GLOBAL(op):
+                stack.append(operand)
+            elif OP.LOAD_DEREF(op):
+                oparg = instructions.opargs[i]
+                try:
+                    operand = func_code.co_cellvars[oparg]
+                except IndexError:
+                    index = oparg - len(func_code.co_cellvars)
+                    operand = func_code.co_freevars[index]
+                stack.append(operand)
+            elif OP.STORE_ATTR(op) :
+                if len(stack) > 0 :
+                    if stack[-1] == utils.cfg().methodArgName:
+                        value = None
+                        if len(stack) > 1 :
+                            value = type(stack[-2])
+                        members[operand] = value
+                    stack = []
+
+def _isAbstractMethod(method):
+    """Return 1 if method is abstract, None if not
+       An abstract method always raises an exception.
+    """
+    instructions = OP.getInstructions(method.func_code)
+    # abstract if the first opcode is RAISE_VARARGS and it raises
+    # NotImplementedError
+    arg = ""
+    for i in range(len(instructions)):
+        op = instructions.ops[i]
+        if OP.LOAD_GLOBAL(op):
+            arg = instructions.operands[i]
+        elif OP.RAISE_VARARGS(op):
+            # if we saw NotImplementedError sometime before the raise
+            # assume it's related to this raise stmt
+            return arg == "NotImplementedError"
+        if OP.conditional(op):
+            break
+    return None
+
+class _ClassModel:
+    """
+    What is found in a class object, including what it inherits, made
+    once and shared by the L{Class}es of all modules made from it and
+    from its subclasses.
+
+    The methods and members of a class object are those of its base
+    classes, updated with its own, so they are made from the models of
+    the base classes instead of looking at the base classes again.
+
+    @ivar classObject: the class object
+    @type classObject: class
+    @ivar bases:       the direct base classes
+    @type bases:       tuple of class
+    @ivar baseClasses: all base classes, depth first, as returned by
+                       L{Class.allBaseClasses}
+    @type baseClasses: list of class
+    """
+
+    def __init__(self, classObject):
+        self.classObject = classObject
+        self.bases = getattr(classObject, '__bases__', None) or ()
+        self.baseClasses = []
+        for base in self.bases:
+            self.baseClasses.append(base)
+            self.baseClasses.extend(getClassModel(base).baseClasses)
+        # which members are found depends on the config
+        self._members = {}      # config key -> (methods, members)
+        self._abstract = {}     # config key -> list of str
+
+    def _getKey(self):
+        cfg = utils.cfg()
+        return cfg.onlyCheckInitForMembers, cfg.methodArgName
+
+    def getMembers(self):
+        """
+        @rtype:   tuple of (dict of str -> function or None,
+                            dict of str -> type or None)
+        @returns: the methods and members of the class object and its base
+                  classes; the methods which are not python functions are
+                  None.  Neither should be changed.
+        """
+        key = self._getKey()
+        found = self._members.get(key)
+        if found is None:
+            methods, members = {}, {}
+            for base in self.bases:
+                baseMethods, baseMembers = getClassModel(base).getMembers()
+                methods.update(baseMethods)
+                members.update(baseMembers)
+            self._addMethods(methods, members)
+            self._addMembers(members)
+            found = self._members[key] = methods, members
+        return found
+
+    def _addMethods(self, methods, members):
+        classObject = self.classObject
+        for classToken in _getClassTokens(classObject):
+            token = getattr(classObject, classToken, None)
+            if token is None:
+                continue
+
+            # Looks like a method.  Need to code it this way to
+            # accommodate ExtensionClass and Python 2.2.  Yecchh.
+            if (hasattr(token, "func_code") and
+                hasattr(token.func_code, "co_argcount")): 
+                methods[token.__name__] = token
+
+            elif hasattr(token, '__get__') and \
+                 not hasattr(token, '__set__') and \
+                 type(token) is not types.ClassType:
+                methods[getattr(token, '__name__', classToken)] = None
+            else:
+                members[classToken] = type(token)
+
+        # add standard methods
+        for methodName in ('__class__', ):
+            methods[methodName] = None
+
+    def _addMembers(self, members):
+        classObject = self.classObject
+        if not utils.cfg().onlyCheckInitForMembers :
+            for classToken in _getClassTokens(classObject) :
+                method = getattr(classObject, classToken, None)
+                if type(method) == types.MethodType :
+                    _findMembers(method.im_func, members)
+        else:
+            try:
+                _findMembers(classObject.__init__.im_func, members)
+            except AttributeError:
+                pass
+
+    def getAbstractMethods(self):
+        """
+        @rtype:   list of str
+        @returns: the names of the abstract methods; should not be changed
+        """
+        key = self._getKey()
+        abstract = self._abstract.get(key)
+        if abstract is None:
+            abstract = self._abstract[key] = []
+            for name, method in self.getMembers()[0].items():
+                if method is not None and _isAbstractMethod(method):
+                    abstract.append(name)
+        return abstract
+
+
 class Class:
     """
     Class to hold all information about a class.
@@ -118,6 +301,14 @@ class Class:
     @type memberRefs:  dict
     @type statics:     dict
     @type lineNums:    dict
+    @ivar attributes:  the names in dir() of the class object, including
+                       the attributes of its base classes; set up when
+                       first used
+    @type attributes:  dict of str -> 1 or None
+    @ivar model:       what was found in the class object, shared with the
+                       other classes made from it; None if its attributes
+                       are ignored
+    @type model:       L{_ClassModel} or None
     """
 
     def __init__(self, name, pcmodule):
@@ -154,12 +345,17 @@ class Class:
         self.classObject__name__ = self.classObject.__name__
 
         self.module = sys.modules.get(modname)
+        if not self.module and modname and utils.cfg().static:
+            self.module = static.loadModule(modname)
         # if the pcmodule has moduleDir, it means we processed it before,
         # and deleted it from sys.modules
         if not self.module and pcmodule.moduleDir is None:
             self.module = module
+            # the module may be gone from sys.modules by the time the
+            # classes of a dependency are set up; see _LazyClasses
             if modname not in utils.cfg().blacklist \
-                and not modname.startswith('_'):
+                and not modname.startswith('_') \
+                and modname != getattr(module, '__name__', None):
                 sys.stderr.write("warning: couldn't find real module "
                                  "for class %s (module name: %s)\n"
                                  % (self.classObject, modname))
@@ -171,6 +367,8 @@ class Class:
         self.memberRefs = {}
         self.statics = {}
         self.lineNums = {}
+        self.attributes = None
+        self.model = None
 
     def __str__(self) :
         return self.name
@@ -189,15 +387,34 @@ class Class:
             return min(lineNums)
         return 0
 
+    def hasAttribute(self, attr) :
+        """
+        @type attr: str
+
+        @rtype: int (used as bool)
+        @returns: whether the class or one of its base classes has the
+                  attribute
+        """
+        if self.methods.has_key(attr) or self.members.has_key(attr) :
+            return 1
+        attributes = self.attributes
+        if attributes is None :
+            attributes = self.attributes = {}
+            try :
+                for name in dir(self.classObject) :
+                    attributes[name] = 1
+            except (TypeError, AttributeError) :
+                # goofy classes, hasattr() below still works
+                pass
+        # dir() does not list the attributes of the metaclass
+        return attributes.has_key(attr) or hasattr(self.classObject, attr)
+
     def allBaseClasses(self, c = None) :
         "Return a list of all base classes for this class and its subclasses"
 
-        baseClasses = []
         if c == None :
             c = self.classObject
-        for base in getattr(c, '__bases__', None) or ():
-            baseClasses = baseClasses + [ base ] + self.allBaseClasses(base)
-        return baseClasses
+        return getClassModel(c).baseClasses[:]
 
     def __getMethodName(self, func_name, className = None) :
         if func_name[0:2] == '__' and func_name[-2:] != '__' :
@@ -208,133 +425,83 @@ class Class:
             func_name = className + func_name
         return func_name
 
-    def addMethod(self, methodName, method=None):
+    def addModel(self, model):
         """
-        Add the given method to this class by name.
-        The name is the real name of the method, not an alias; ie the name of
-        the method as defined in the code.
+        Add the methods and members found in the class object and its base
+        classes.
 
-        @type methodName: str
-        @type method:     method or None
+        @type model: L{_ClassModel}
         """
-        if not method:
-            self.methods[methodName] = None
-        else :
-            assert method.func_name == methodName
-            self.methods[methodName] = function.Function(method, 1)
-                 
-    def addMethods(self, classObject):
-        """
-        Add all methods for this class object to the class.
+        self.model = model
+        methods, members = model.getMembers()
+        for methodName, method in methods.items():
+            if method is None:
+                self.methods[methodName] = None
+            else:
+                self.methods[methodName] = function.Function(method, 1)
+        self.members.update(members)
+        for name in members.keys():
+            self.memberRefs[name] = None
+        try :
+            del self.memberRefs[Config.CHECKER_VAR]
+        except KeyError :
+            pass
 
-        @param classObject: the class object to add methods from.
-        @type  classObject: types.ClassType (classobj)
-        """
-        for classToken in _getClassTokens(classObject):
-            token = getattr(classObject, classToken, None)
-            if token is None:
-                continue
+    def isAbstract(self):
+        """Return the method names that make a class abstract.
+           An abstract class has at least one abstract method."""
+        if self.model is None:
+            return []
+        return self.model.getAbstractMethods()[:]
 
-            # Looks like a method.  Need to code it this way to
-            # accommodate ExtensionClass and Python 2.2.  Yecchh.
-            if (hasattr(token, "func_code") and
-                hasattr(token.func_code, "co_argcount")): 
-                self.addMethod(token.__name__, method=token)
 
-            elif hasattr(token, '__get__') and \
-                 not hasattr(token, '__set__') and \
-                 type(token) is not types.ClassType:
-                self.addMethod(getattr(token, '__name__', classToken))
-            else:
-                self.members[classToken] = type(token)
-                self.memberRefs[classToken] = None
+# the members of a dependency module which are only set up when first used
+_LAZY_MEMBERS = ('variables', 'functions', 'classes', 'modules')
 
-        self.cleanupMemberRefs()
-        # add standard methods
-        for methodName in ('__class__', ):
-            self.addMethod(methodName)
+class _LazyClasses(dict):
+    """
+    The classes of a module which is not checked itself.  The names are
+    known up front, but a L{Class} is only created, and its methods and
+    members scanned, when it is looked up.
+
+    @ivar pcmodule: the module the classes are in
+    @type pcmodule: L{PyCheckerModule}
+    @ivar config:   the configuration in effect when the module was loaded
+    @type config:   L{Config.Config}
+    """
 
-    def addMembers(self, classObject) :
-        if not utils.cfg().onlyCheckInitForMembers :
-            for classToken in _getClassTokens(classObject) :
-                method = getattr(classObject, classToken, None)
-                if type(method) == types.MethodType :
-                    self.addMembersFromMethod(method.im_func)
-        else:
+    def __init__(self, pcmodule, config):
+        dict.__init__(self)
+        self.pcmodule = pcmodule
+        self.config = config
+
+    def __getitem__(self, name):
+        c = dict.__getitem__(self, name)
+        if c is None:
+            utils.initConfig(self.config)
             try:
-                self.addMembersFromMethod(classObject.__init__.im_func)
-            except AttributeError:
-                pass
+                c = self.pcmodule._setupClass(name)
+            finally:
+                utils.popConfig()
+            dict.__setitem__(self, name, c)
+        return c
 
-    def addMembersFromMethod(self, method) :
-        if not hasattr(method, 'func_code') :
-            return
+    def get(self, name, default=None):
+        if not dict.__contains__(self, name):
+            return default
+        return self[name]
 
-        func_code, code, i, maxCode, extended_arg = OP.initFuncCode(method)
-        stack = []
-        while i < maxCode :
-            op, oparg, i, extended_arg = OP.getInfo(code, i, extended_arg)
-            if op >= OP.HAVE_ARGUMENT :
-                operand = OP.getOperand(op, func_code, oparg)
-                if OP.LOAD_CONST(op) or OP.LOAD_FAST(op) or OP.LOAD_GLOBAL(op):
-                    stack.append(operand)
-                elif OP.LOAD_DEREF(op):
-                    try:
-                        operand = func_code.co_cellvars[oparg]
-                    except IndexError:
-                        index = oparg - len(func_code.co_cellvars)
-                        operand = func_code.co_freevars[index]
-                    stack.append(operand)
-                elif OP.STORE_ATTR(op) :
-                    if len(stack) > 0 :
-                        if stack[-1] == utils.cfg().methodArgName:
-                            value = None
-                            if len(stack) > 1 :
-                                value = type(stack[-2])
-                            self.members[operand] = value
-                            self.memberRefs[operand] = None
-                        stack = []
-
-        self.cleanupMemberRefs()
-
-    def cleanupMemberRefs(self) :
-        try :
-            del self.memberRefs[Config.CHECKER_VAR]
-        except KeyError :
-            pass
+    def values(self):
+        return [self[name] for name in self.keys()]
 
-    def abstractMethod(self, m):
-        """Return 1 if method is abstract, None if not
-           An abstract method always raises an exception.
-        """
-        if not self.methods.get(m, None):
-            return None
-        funcCode, codeBytes, i, maxCode, extended_arg = \
-                   OP.initFuncCode(self.methods[m].function)
-        # abstract if the first opcode is RAISE_VARARGS and it raises
-        # NotImplementedError
-        arg = ""
-        while i < maxCode:
-            op, oparg, i, extended_arg = OP.getInfo(codeBytes, i, extended_arg)
-            if OP.LOAD_GLOBAL(op):
-                arg = funcCode.co_names[oparg]
-            elif OP.RAISE_VARARGS(op):
-                # if we saw NotImplementedError sometime before the raise
-                # assume it's related to this raise stmt
-                return arg == "NotImplementedError"
-            if OP.conditional(op):
-                break
-        return None
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
 
-    def isAbstract(self):
-        """Return the method names that make a class abstract.
-           An abstract class has at least one abstract method."""
-        result = []
-        for m in self.methods.keys():
-            if self.abstractMethod(m):
-                result.append(m)
-        return result
+    def itervalues(self):
+        return iter(self.values())
 
+    def iteritems(self):
+        return iter(self.items())
 
 class PyCheckerModule:
     """
@@ -364,14 +531,21 @@ class PyCheckerModule:
     @ivar moduleLineNums: mapping of the module's nameds/operands to the
                           filename and linenumber where they are created
     @type moduleLineNums: dict of str or tuple of str -> (str, int)
+    @ivar attributes:     the names of the attributes of the module
+    @type attributes:     dict of str -> 1
     @type mainCode:       L{function.Function}
     @ivar check:          whether this module should be checked
     @type check:          int (used as bool)
-    @ivar codes:          a list of all code in this module; used for
+    @ivar codes:          a list of all code in this module, only kept
+                          when the keepCodes config is set; used for
                           testing
     @type codes:          list of L{CodeChecks.Code}
     @ivar python:         whether this is a pure python module
     @type python:         int (used as bool)
+
+    For modules which are not checked, variables, functions, classes and
+    modules are only set up when first used, and each class only when it
+    is looked up.
     """
 
     def __init__(self, moduleName, check=1, moduleDir=None):
@@ -397,7 +571,7 @@ class PyCheckerModule:
         self.modules = {}
         self.imported = {}
         self.moduleLineNums = {}
-        self.attributes = [ '__dict__' ]
+        self.attributes = { '__dict__': 1 }
         self.mainCode = None
         self.check = check
         # key on a combination of moduleName and moduleDir so we have separate
@@ -411,6 +585,13 @@ class PyCheckerModule:
 
     __repr__ = utils.std_repr
 
+    def __getattr__(self, name):
+        # only called for members not set; see _initModule
+        if name in _LAZY_MEMBERS and self.__dict__.has_key('_lazyConfig'):
+            self._setupTokens()
+            return self.__dict__[name]
+        raise AttributeError, name
+
     def addVariable(self, var, varType):
         """
         @param var:     name of the variable
@@ -430,14 +611,17 @@ class PyCheckerModule:
         """
         self.functions[alias] = function.Function(func)
 
-    def __addAttributes(self, c, classObject) :
-        for base in getattr(classObject, '__bases__', None) or ():
-            self.__addAttributes(c, base)
-        c.addMethods(classObject)
-        c.addMembers(classObject)
-
     def addClass(self, name):
-        self.classes[name] = c = Class(name, self)
+        if isinstance(self.classes, _LazyClasses):
+            dict.__setitem__(self.classes, name, None)
+        else:
+            self.classes[name] = self._setupClass(name)
+
+    def _setupClass(self, name):
+        """
+        @rtype: L{Class}
+        """
+        c = Class(name, self)
         try:
             objName = utils.safestr(c.classObject)
         except TypeError:
@@ -447,7 +631,8 @@ class PyCheckerModule:
             packages = string.split(objName, '.')
             c.ignoreAttrs = packages[0] in utils.cfg().blacklist
         if not c.ignoreAttrs :
-            self.__addAttributes(c, c.classObject)
+            c.addModel(getClassModel(c.classObject))
+        return c
 
     def addModule(self, name, alias, moduleDir=None) :
         """
@@ -463,13 +648,60 @@ class PyCheckerModule:
             if imp.is_builtin(name) == 0:
                 module.load()
             else :
-                # FIXME: probably should be alias ?
-                globalModule = globals().get(name)
-                if globalModule :
-                    module.attributes.extend(dir(globalModule))
+                # the tokens of a dependency can be set up after
+                # check.fixupBuiltinModules, so do the same here
+                module.setupBuiltinAttributes()
         else :
             self.modules[alias] = module
 
+    def addAttributes(self, names):
+        """
+        Add names to the attributes of the module.
+
+        @type names: list of str
+        """
+        for name in names:
+            self.attributes[name] = 1
+
+    def getImportedModules(self):
+        """
+        Return the modules imported by this module, without setting up the
+        tokens of a dependency which were not used yet.
+
+        @rtype: list of L{PyCheckerModule}
+        """
+        if not self.__dict__.has_key('_lazyConfig'):
+            return self.modules.values()
+
+        imported = []
+        for token in vars(self.module).values():
+            if isinstance(token, types.ModuleType):
+                module = getPCModule(token.__name__)
+                if module is not None:
+                    imported.append(module)
+        return imported
+
+    def setupBuiltinAttributes(self):
+        """
+        Set the attributes of a builtin module from the module itself.
+        """
+        # initializing sys again resets sys.stdout and sys.stderr, which are
+        # redirected by worker processes and the server
+        stdout, stderr = sys.stdout, sys.stderr
+        try :
+            try :
+                m = imp.init_builtin(self.moduleName)
+            except ImportError :
+                return
+        finally :
+            sys.stdout, sys.stderr = stdout, stderr
+        if m is None :
+            return
+
+        extra_attrs = _BUILTIN_MODULE_ATTRS.get(self.moduleName, [])
+        self.attributes = { '__dict__': 1 }
+        self.addAttributes(dir(m) + extra_attrs)
+
     def addImported(self, name, line, pcmodule):
         """
         Track where a given token name is imported.
@@ -512,6 +744,9 @@ class PyCheckerModule:
             # is specified for this module
             # NOTE: self.moduleDir can be '' if the module tested lives in
             # the current working directory
+            if utils.cfg().static:
+                return self._initModule(self.setupStaticCode())
+
             if self.moduleDir is None:
                 module = sys.modules.get(self.moduleName)
                 if module:
@@ -545,7 +780,41 @@ class PyCheckerModule:
 
     def _initModule(self, module):
         self.module = module
-        self.attributes = dir(self.module)
+        self.attributes = {}
+        self.addAttributes(dir(self.module))
+
+        if not self.check:
+            # only set up the tokens of a dependency when they are used,
+            # most of them never are
+            for name in _LAZY_MEMBERS:
+                self.__dict__.pop(name, None)
+            self._lazyConfig = utils.cfg()
+            return 1
+
+        self._addTokens()
+        return 1
+
+    def _setupTokens(self):
+        """
+        Set up the tokens of a dependency, with the configuration in effect
+        when it was loaded.
+        """
+        config = self.__dict__.pop('_lazyConfig')
+        self.variables = {}
+        self.functions = {}
+        self.classes = {}
+        self.modules = {}
+        utils.initConfig(config)
+        try:
+            self._addTokens()
+        finally:
+            utils.popConfig()
+
+    def _addTokens(self):
+        """
+        Read all tokens from the real module, and register them.
+        """
+        module = self.module
 
         # interpret module-specific suppressions
         pychecker_attr = getattr(module, Config.CHECKER_VAR, None)
@@ -553,7 +822,9 @@ class PyCheckerModule:
             utils.pushConfig()
             utils.updateCheckerArgs(pychecker_attr, 'suppressions', 0, [])
 
-        # read all tokens from the real module, and register them
+        if not self.check:
+            self.classes = _LazyClasses(self, utils.cfg())
+
         for tokenName in _getModuleTokens(self.module):
             if EVIL_C_OBJECTS.has_key('%s.%s' % (self.moduleName, tokenName)):
                 continue
@@ -580,7 +851,6 @@ class PyCheckerModule:
 
         if pychecker_attr is not None :
             utils.popConfig()
-        return 1
 
     def setupMainCode(self):
         # FIXME: imp.find_module does not work if self.moduleName contains
@@ -613,6 +883,22 @@ class PyCheckerModule:
         self._setupMainCode(handle, filename, module)
         return module
 
+    def setupStaticCode(self):
+        """
+        Load the module without running it.
+        """
+        module = static.loadModule(self.moduleName, self.moduleDir)
+        if module is None:
+            raise ImportError, "No module named %s" % self.moduleName
+
+        filename = getattr(module, '__file__', None)
+        self.python = filename is not None and \
+                      _getPyFile(filename)[-3:] == '.py'
+        if self.python and self.moduleDir is not None:
+            filename = _getPyFile(filename)
+            self._setupMainCode(open(filename), filename, module)
+        return module
+
     def _setupMainCode(self, handle, filename, module):
         try:
             self.mainCode = function.create_from_file(handle, filename, module)
@@ -688,6 +974,20 @@ def addPCModule(pcmodule):
     global __pcmodules
     __pcmodules[(pcmodule.moduleName, pcmodule.moduleDir)] = pcmodule
 
+def removePCModule(pcmodule):
+    """
+    @type  pcmodule: L{pychecker.checker.PyCheckerModule}
+    """
+    global __pcmodules
+    key = (pcmodule.moduleName, pcmodule.moduleDir)
+    if __pcmodules.get(key) is pcmodule:
+        del __pcmodules[key]
+    # the classes of the module may be base classes of any other class
+    _classModels.clear()
+    # the caches do not tell which module a code object belongs to
+    OP.clearInstructions()
+    function.clearSignatures()
+
 def _getPCModulesDict():
     """
     Only to be used for testing.
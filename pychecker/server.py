@@ -0,0 +1,227 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+"""
+Check files sent over a unix domain socket, keeping the loaded modules
+between requests, so only modules which changed need to be loaded again.
+
+A request is the working directory of the client and its arguments, one
+per line, ended by an empty line.  The response is the output of checking,
+followed by a NUL character and the exit status.
+"""
+
+import os
+import sys
+import socket
+import traceback
+
+from pychecker import utils
+from pychecker import Config
+from pychecker import pcmodules
+from pychecker import check
+
+_END = '\0'
+
+
+def _getMtime(filename):
+    try:
+        return os.path.getmtime(filename)
+    except OSError:
+        return None
+
+
+class Server:
+    """
+    @ivar path:   the path of the unix domain socket
+    @type path:   str
+    @ivar mtimes: the modification time of the source of loaded modules
+    @type mtimes: dict of str -> float
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtimes = {}
+
+    def serve(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # only the owner can connect
+        oldUmask = os.umask(077)
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(oldUmask)
+        listener.listen(5)
+        utils.debug('server: listening on %s', self.path)
+
+        try:
+            while 1:
+                connection, _ = listener.accept()
+                try:
+                    self.handle(connection)
+                finally:
+                    connection.close()
+        finally:
+            listener.close()
+            os.remove(self.path)
+
+    def handle(self, connection):
+        """
+        Check the files for one request, writing the output to connection.
+        """
+        reader = connection.makefile('r')
+        cwd = reader.readline().rstrip('\n')
+        args = []
+        while 1:
+            line = reader.readline()
+            if not line or line == '\n':
+                break
+            args.append(line.rstrip('\n'))
+        reader.close()
+
+        stream = connection.makefile('w')
+        oldCwd = os.getcwd()
+        oldStdout, oldStderr = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = stream
+        try:
+            try:
+                os.chdir(cwd)
+                status = self.check(args, stream)
+            except Config.UsageError:
+                status = 127
+            except SystemExit, e:
+                status = e.code
+            except (KeyboardInterrupt, socket.error):
+                raise
+            except Exception:
+                traceback.print_exc(file=stream)
+                status = 2
+        finally:
+            sys.stdout, sys.stderr = oldStdout, oldStderr
+            os.chdir(oldCwd)
+
+        stream.write('%s%s\n' % (_END, status or 0))
+        stream.close()
+
+    def check(self, args, stream):
+        """
+        Check the files as checker.main would, reusing the modules loaded
+        for earlier requests unless they changed.
+
+        @type  args:   list of str
+        @param stream: the stream to write the output to
+
+        @rtype: int
+        """
+        cfg, files, suppressions = Config.setupFromArgs(args)
+        if not files:
+            return 0
+
+        for evil_doer in cfg.evil:
+            pcmodules.EVIL_C_OBJECTS[evil_doer] = None
+
+        self._forgetChanged()
+        warnings = check._check(files, cfg=cfg, suppressions=suppressions)
+        self._recordLoaded()
+
+        if not cfg.quiet:
+            stream.write("\nWarnings...\n\n")
+        if warnings:
+            check._printWarnings(warnings, stream)
+            return 1
+
+        if not cfg.quiet:
+            stream.write("None\n")
+        return 0
+
+    def _recordLoaded(self):
+        for pcmodule in pcmodules.getPCModules():
+            filename = pcmodule.filename()
+            if filename[-3:] == '.py' and not self.mtimes.has_key(filename):
+                self.mtimes[filename] = _getMtime(filename)
+
+    def _forgetChanged(self):
+        """
+        Forget the modules whose source changed since they were loaded, and
+        the modules importing them, so they are loaded again.
+        """
+        pending = []
+        for pcmodule in pcmodules.getPCModules():
+            filename = pcmodule.filename()
+            mtime = self.mtimes.get(filename)
+            if mtime is not None and _getMtime(filename) != mtime:
+                pending.append(pcmodule)
+        if not pending:
+            return
+
+        importers = {}
+        for pcmodule in pcmodules.getPCModules():
+            for module in pcmodule.getImportedModules():
+                importers.setdefault(module, []).append(pcmodule)
+
+        forgotten = {}
+        while pending:
+            pcmodule = pending.pop()
+            if forgotten.has_key(pcmodule):
+                continue
+            forgotten[pcmodule] = 1
+            utils.debug('server: forgetting module %s', pcmodule)
+
+            pcmodules.removePCModule(pcmodule)
+            if pcmodule.module is not None and \
+               sys.modules.get(pcmodule.moduleName) is pcmodule.module:
+                del sys.modules[pcmodule.moduleName]
+            filename = pcmodule.filename()
+            if self.mtimes.has_key(filename):
+                del self.mtimes[filename]
+            pending.extend(importers.get(pcmodule, []))
+
+
+def serve(path):
+    """
+    Serve check requests on the unix domain socket at path until
+    interrupted.
+    """
+    Server(path).serve()
+
+def connect(path, args, stream=None):
+    """
+    Send the arguments to the server at path and copy the output to stream.
+
+    @type  args: list of str
+
+    @rtype:   int
+    @returns: the exit status of checking
+    """
+    if stream is None:
+        stream = sys.stdout
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    try:
+        request = [os.getcwd()] + args + ['', '']
+        client.sendall('\n'.join(request))
+
+        # write the output as it arrives, holding back the exit status
+        data = ''
+        while 1:
+            chunk = client.recv(8192)
+            if not chunk:
+                break
+            data = data + chunk
+            end = data.find(_END)
+            if end < 0:
+                stream.write(data)
+                data = ''
+            else:
+                stream.write(data[:end])
+                data = data[end:]
+        stream.flush()
+    finally:
+        client.close()
+
+    try:
+        return int(data[len(_END):])
+    except ValueError:
+        return 2
@@ -0,0 +1,473 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+"""
+Load modules without running them.
+
+The namespace of a module is rebuilt from the bytecode of its compiled code:
+names stored at module level, functions made from code objects, classes
+built from the code of their body and imported modules, which are loaded
+the same way.  Values which can only be known by running code are None.
+Extension and builtin modules are imported as usual, since they have no
+python code to run.
+"""
+
+import os
+import sys
+import imp
+import dis
+import types
+import struct
+import marshal
+import __builtin__
+
+from pychecker import OP
+from pychecker import utils
+
+# the code of a class body returns its namespace
+_LOAD_LOCALS = dis.opmap['LOAD_LOCALS']
+
+# decorators which can be called without running checked code
+_SAFE_CALLS = (staticmethod, classmethod, property)
+
+# modules loaded, by filename and by name
+_modules = {}
+_modulesByName = {}
+
+
+class _UnknownMeta(type):
+    """
+    Metaclass of the base class used for bases that can't be known, so
+    any attribute may come from them.
+    """
+    def __getattr__(cls, name):
+        if name[:2] == '__' and name[-2:] == '__':
+            raise AttributeError, name
+        return None
+
+class _UnknownBase(object):
+    __metaclass__ = _UnknownMeta
+
+
+def _makeCell(value=None):
+    return (lambda: value).func_closure[0]
+
+def _getCode(filename):
+    """
+    Get the code for the source in filename, from its compiled file if it
+    is up to date.
+
+    @rtype: L{types.CodeType}
+    """
+    try:
+        mtime = long(os.path.getmtime(filename))
+        f = open(filename + 'c', 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        if data[:4] == imp.get_magic() and \
+           struct.unpack('<I', data[4:8])[0] == mtime:
+            return marshal.loads(data[8:])
+    except (IOError, OSError, EOFError, ValueError, TypeError, struct.error):
+        pass
+
+    f = open(filename, 'rU')
+    try:
+        source = f.read()
+    finally:
+        f.close()
+    if source and source[-1] != '\n':
+        source = source + '\n'
+    return compile(source, filename, 'exec')
+
+def _find(name, path):
+    """
+    @rtype: tuple of (str, tuple) or None
+    @returns: the filename and the (suffix, mode, type) of module name
+              in path
+    """
+    try:
+        return utils.resolveModule(name, path)
+    except ImportError:
+        return None
+
+def _loadFound(name, filename, smt):
+    """
+    @rtype: L{types.ModuleType} or None
+    """
+    moduleType = smt[2]
+    if moduleType == imp.PKG_DIRECTORY:
+        source = os.path.join(filename, '__init__.py')
+    elif moduleType == imp.PY_SOURCE:
+        source = filename
+    elif moduleType == imp.PY_COMPILED:
+        source = filename[:-1]
+    else:
+        # extension modules have no python code to run
+        handle = None
+        try:
+            try:
+                if moduleType == imp.C_EXTENSION:
+                    handle = open(filename, smt[1])
+                return imp.load_module(name, handle, filename, smt)
+            finally:
+                if handle is not None:
+                    handle.close()
+        except Exception:
+            return None
+
+    if _modules.has_key(source):
+        return _modules[source]
+
+    try:
+        if moduleType == imp.PY_COMPILED and not os.path.exists(source):
+            f = open(filename, 'rb')
+            try:
+                code = marshal.loads(f.read()[8:])
+            finally:
+                f.close()
+        else:
+            code = _getCode(source)
+    except (IOError, OSError, ValueError), e:
+        utils.debug('static: could not load %s: %s', source, e)
+        return None
+
+    module = imp.new_module(name)
+    module.__file__ = source
+    if moduleType == imp.PKG_DIRECTORY:
+        module.__path__ = [filename]
+    _modules[source] = _modulesByName[name] = module
+
+    _Frame(code, module.__dict__, module.__dict__,
+           os.path.dirname(source)).run()
+    return module
+
+def getModule(name):
+    """
+    @returns: the module already loaded with the given name
+    @rtype:   L{types.ModuleType} or None
+    """
+    return _modulesByName.get(name) or sys.modules.get(name)
+
+def loadModule(name, moduleDir=None):
+    """
+    Load the module with the given name without running it, first looking
+    in moduleDir if given.
+
+    @param moduleDir: the directory to look in first; can be the empty
+                      string for the current directory
+    @type  moduleDir: str
+
+    @rtype: L{types.ModuleType} or None if it can not be found
+    """
+    if '.' in name:
+        parentName, childName = name.rsplit('.', 1)
+        parent = loadModule(parentName, moduleDir)
+        path = getattr(parent, '__path__', None)
+        module = getattr(parent, childName, None)
+        if not isinstance(module, types.ModuleType):
+            # not a package, but the submodule may have been imported
+            if not path:
+                return getModule(name)
+            found = _find(childName, path)
+            if found is None:
+                return None
+            module = _loadFound(name, found[0], found[1])
+            if module is not None:
+                setattr(parent, childName, module)
+        return module
+
+    if moduleDir is not None:
+        found = _find(name, [moduleDir])
+        if found is not None:
+            return _loadFound(name, found[0], found[1])
+
+    module = getModule(name)
+    if module is not None:
+        return module
+
+    if imp.is_builtin(name):
+        try:
+            return __import__(name)
+        except ImportError:
+            return None
+
+    found = _find(name, sys.path)
+    if found is None:
+        return None
+    return _loadFound(name, found[0], found[1])
+
+
+class _Frame:
+    """
+    Follows the instructions of code, keeping the values which are known
+    without running code on a stack, and storing names in the namespace.
+
+    @ivar code:      the code to follow
+    @type code:      L{types.CodeType}
+    @ivar namespace: where names are stored
+    @type namespace: dict
+    @ivar globals:   the namespace of the module
+    @type globals:   dict
+    @ivar directory: the directory of the module, to import siblings from
+    @type directory: str
+    """
+
+    def __init__(self, code, namespace, globals, directory):
+        self.code = code
+        self.namespace = namespace
+        self.globals = globals
+        self.directory = directory
+        self.stack = []
+
+    def push(self, value):
+        self.stack.append(value)
+
+    def pop(self, count=None):
+        if count is None:
+            if self.stack:
+                return self.stack.pop()
+            return None
+        start = max(0, len(self.stack) - count)
+        values = self.stack[start:]
+        del self.stack[start:]
+        return [None] * (count - len(values)) + values
+
+    def lookup(self, name):
+        for namespace in (self.namespace, self.globals, __builtin__.__dict__):
+            if namespace.has_key(name):
+                return namespace[name]
+        return None
+
+    def store(self, name, value):
+        # a value which is not known does not replace one which is, as for
+        # try: import x except ImportError: x = None
+        if value is None and self.namespace.get(name) is not None:
+            return
+        # nor does it shadow a builtin, as for except KeyError, Exception:
+        if value is None and __builtin__.__dict__.has_key(name):
+            return
+        self.namespace[name] = value
+
+    def run(self):
+        instructions = OP.getInstructions(self.code)
+        for i in range(len(instructions)):
+            op = instructions.ops[i]
+            name = dis.opname[op]
+            if name == 'RETURN_VALUE':
+                break
+            handler = getattr(self, '_' + name, None)
+            if handler is None:
+                # the effect on the stack is not known, so forget it
+                self.stack = []
+            else:
+                handler(instructions.opargs[i], instructions.operands[i])
+
+    def _EXTENDED_ARG(self, oparg, operand):
+        pass
+
+    def _POP_TOP(self, oparg, operand):
+        self.pop()
+
+    def _DUP_TOP(self, oparg, operand):
+        value = self.pop()
+        self.push(value)
+        self.push(value)
+
+    def _ROT_TWO(self, oparg, operand):
+        self.stack[-2:] = self.pop(2)[::-1]
+
+    def _LOAD_CONST(self, oparg, operand):
+        self.push(operand)
+
+    def _LOAD_NAME(self, oparg, operand):
+        self.push(self.lookup(operand))
+
+    _LOAD_GLOBAL = _LOAD_NAME
+
+    def _LOAD_LOCALS(self, oparg, operand):
+        self.push(self.namespace)
+
+    def _LOAD_CLOSURE(self, oparg, operand):
+        self.push(_makeCell())
+
+    def _LOAD_ATTR(self, oparg, operand):
+        value = self.pop()
+        if isinstance(value, (types.ModuleType, types.ClassType, type)):
+            try:
+                self.push(getattr(value, operand, None))
+                return
+            except Exception:
+                pass
+        self.push(None)
+
+    def _STORE_NAME(self, oparg, operand):
+        self.store(operand, self.pop())
+
+    _STORE_GLOBAL = _STORE_NAME
+
+    def _DELETE_NAME(self, oparg, operand):
+        if self.namespace.has_key(operand):
+            del self.namespace[operand]
+
+    def _STORE_ATTR(self, oparg, operand):
+        self.pop(2)
+
+    def _STORE_SUBSCR(self, oparg, operand):
+        self.pop(3)
+
+    def _BUILD_TUPLE(self, oparg, operand):
+        self.push(tuple(self.pop(oparg)))
+
+    def _BUILD_LIST(self, oparg, operand):
+        self.push(self.pop(oparg))
+
+    def _BUILD_MAP(self, oparg, operand):
+        self.push({})
+
+    def _STORE_MAP(self, oparg, operand):
+        self.pop(2)
+
+    def _UNPACK_SEQUENCE(self, oparg, operand):
+        value = self.pop()
+        if isinstance(value, (tuple, list)) and len(value) == oparg:
+            values = list(value)
+        else:
+            values = [None] * oparg
+        values.reverse()
+        self.stack.extend(values)
+
+    def _MAKE_FUNCTION(self, oparg, operand):
+        code = self.pop()
+        defaults = self.pop(oparg)
+        self.push(self.makeFunction(code, defaults))
+
+    def _MAKE_CLOSURE(self, oparg, operand):
+        code = self.pop()
+        self.pop()
+        defaults = self.pop(oparg)
+        closure = None
+        if isinstance(code, types.CodeType):
+            closure = tuple([_makeCell() for name in code.co_freevars])
+        self.push(self.makeFunction(code, defaults, closure))
+
+    def makeFunction(self, code, defaults, closure=None):
+        if not isinstance(code, types.CodeType):
+            return None
+        return types.FunctionType(code, self.globals, code.co_name,
+                                  tuple(defaults) or None, closure)
+
+    def _CALL_FUNCTION(self, oparg, operand, extra=0):
+        count = (oparg & 0xff) + 2 * (oparg >> 8) + extra
+        args = self.pop(count)[:oparg & 0xff]
+        self.push(self.call(self.pop(), args))
+
+    def _CALL_FUNCTION_VAR(self, oparg, operand):
+        self._CALL_FUNCTION(oparg, operand, 1)
+
+    _CALL_FUNCTION_KW = _CALL_FUNCTION_VAR
+
+    def _CALL_FUNCTION_VAR_KW(self, oparg, operand):
+        self._CALL_FUNCTION(oparg, operand, 2)
+
+    def call(self, func, args):
+        """
+        @returns: the result of calling func with args, if it can be known
+                  without running code of the module
+        """
+        if isinstance(func, types.FunctionType) and not args and \
+           _LOAD_LOCALS in OP.getInstructions(func.func_code).ops:
+            # the body of a class, giving its namespace
+            namespace = {}
+            _Frame(func.func_code, namespace, self.globals,
+                   self.directory).run()
+            return namespace
+
+        if len(args) == 1 and \
+           isinstance(args[0], (types.FunctionType, types.ClassType, type)):
+            if func in _SAFE_CALLS:
+                return func(args[0])
+            # assume unknown decorators keep what they decorate
+            return args[0]
+
+        return None
+
+    def _BUILD_CLASS(self, oparg, operand):
+        namespace = self.pop()
+        bases = self.pop()
+        name = self.pop()
+        if not isinstance(name, str):
+            self.push(None)
+            return
+        if not isinstance(namespace, dict):
+            namespace = {}
+        if not isinstance(bases, tuple):
+            bases = ()
+        self.push(_buildClass(name, bases, namespace))
+
+    def _IMPORT_NAME(self, oparg, operand):
+        fromlist = self.pop()
+        self.pop()
+        try:
+            module = loadModule(operand, self.directory)
+            if module is not None and not fromlist:
+                # import a.b binds a
+                module = loadModule(operand.split('.')[0], self.directory)
+        except SyntaxError:
+            module = None
+        self.push(module)
+
+    def _IMPORT_FROM(self, oparg, operand):
+        module = self.stack and self.stack[-1]
+        value = None
+        if isinstance(module, types.ModuleType):
+            value = getattr(module, operand, None)
+            if value is None and getattr(module, '__path__', None):
+                try:
+                    value = loadModule(module.__name__ + '.' + operand)
+                except SyntaxError:
+                    pass
+        self.push(value)
+
+    def _IMPORT_STAR(self, oparg, operand):
+        module = self.pop()
+        if not isinstance(module, types.ModuleType):
+            return
+        names = getattr(module, '__all__', None)
+        if not isinstance(names, (list, tuple)):
+            names = [name for name in dir(module) if name[:1] != '_']
+        for name in names:
+            if isinstance(name, str) and hasattr(module, name):
+                self.store(name, getattr(module, name))
+
+def _buildClass(name, bases, namespace):
+    """
+    Make a class with the namespace, using a base accepting any attribute
+    for bases that are not known.
+    """
+    realBases = []
+    newStyle = 0
+    for base in bases:
+        if isinstance(base, type):
+            newStyle = 1
+        elif not isinstance(base, types.ClassType):
+            base = _UnknownBase
+            newStyle = 1
+        realBases.append(base)
+
+    namespace = namespace.copy()
+    if namespace.has_key('__metaclass__'):
+        del namespace['__metaclass__']
+    try:
+        if newStyle:
+            return type(name, tuple(realBases), namespace)
+        return types.ClassType(name, tuple(realBases), namespace)
+    except TypeError:
+        # for example, conflicting layouts or bad __slots__
+        if namespace.has_key('__slots__'):
+            del namespace['__slots__']
+        try:
+            return type(name, (_UnknownBase, ), namespace)
+        except TypeError:
+            return None
@@ -0,0 +1,223 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+"""
+Time spent checking, by phase, by module, by opcode handler and by
+function, reported with --stats.
+
+Nothing is recorded unless enable() was called; callers check the
+enabled flag before calling anything else here, so the timing costs
+nothing when it is off.
+"""
+
+import sys
+import time
+import heapq
+
+# whether to record timing
+enabled = 0
+
+# the number of slowest functions to keep
+SLOWEST = 20
+
+_phases = {}    # phase -> [count, wall, cpu]
+_modules = {}   # module name -> phase -> wall
+_handlers = {}  # opcode handler name -> [count, wall]
+_functions = [] # heap of the SLOWEST (wall, function name, filename, line)
+_dispatch = None # the original opcode handlers
+
+
+def enable():
+    """
+    Start recording, timing the opcode handlers too.
+    """
+    global enabled, _dispatch
+    enabled = 1
+    reset()
+
+    from pychecker import CodeChecks
+    if _dispatch is None:
+        _dispatch = CodeChecks.DISPATCH[:]
+        for op in range(len(_dispatch)):
+            if _dispatch[op] is not None:
+                CodeChecks.DISPATCH[op] = _timeHandler(_dispatch[op])
+
+def disable():
+    global enabled, _dispatch
+    enabled = 0
+
+    from pychecker import CodeChecks
+    if _dispatch is not None:
+        CodeChecks.DISPATCH[:] = _dispatch
+        _dispatch = None
+
+def reset():
+    """
+    Forget what was recorded so far.
+    """
+    _phases.clear()
+    _modules.clear()
+    _handlers.clear()
+    del _functions[:]
+
+def _timeHandler(handler):
+    name = handler.__name__.lstrip('_')
+
+    def timed(oparg, operand, codeSource, code):
+        started = time.time()
+        try:
+            handler(oparg, operand, codeSource, code)
+        finally:
+            counts = _handlers.get(name)
+            if counts is None:
+                counts = _handlers[name] = [0, 0.0]
+            counts[0] = counts[0] + 1
+            counts[1] = counts[1] + time.time() - started
+
+    timed.__name__ = handler.__name__
+    return timed
+
+def start():
+    """
+    @rtype:   tuple of (float, float)
+    @returns: the wall and CPU time now, to pass to the add functions
+    """
+    return time.time(), time.clock()
+
+def addPhase(phase, started, moduleName=None):
+    """
+    Record the time since started for phase, and for the module if given.
+
+    @type  phase:      str
+    @param started:    as returned by start()
+    @type  moduleName: str or None
+    """
+    wall = time.time() - started[0]
+    cpu = time.clock() - started[1]
+    times = _phases.get(phase)
+    if times is None:
+        times = _phases[phase] = [0, 0.0, 0.0]
+    times[0] = times[0] + 1
+    times[1] = times[1] + wall
+    times[2] = times[2] + cpu
+
+    if moduleName is not None:
+        phases = _modules.setdefault(moduleName, {})
+        phases[phase] = phases.get(phase, 0.0) + wall
+
+def addFunction(started, func_code, name=None):
+    """
+    Record the time since started for checking the code of a function.
+
+    @param started:   as returned by start()
+    @type  func_code: L{types.CodeType}
+    @param name:      the name to show, if not the name of the code
+    @type  name:      str or None
+    """
+    entry = (time.time() - started[0], name or func_code.co_name,
+             func_code.co_filename, func_code.co_firstlineno)
+    if len(_functions) < SLOWEST:
+        heapq.heappush(_functions, entry)
+    else:
+        heapq.heappushpop(_functions, entry)
+
+def getData():
+    """
+    @rtype:   dict
+    @returns: everything recorded, in a form which can be written as JSON
+    """
+    functions = _functions[:]
+    functions.sort()
+    functions.reverse()
+    return {
+        'phases': dict([(phase, {'count': times[0], 'wall': times[1],
+                                 'cpu': times[2]})
+                        for phase, times in _phases.items()]),
+        'modules': dict([(name, phases.copy())
+                         for name, phases in _modules.items()]),
+        'handlers': dict([(name, {'count': counts[0], 'wall': counts[1]})
+                          for name, counts in _handlers.items()]),
+        'functions': [{'wall': wall, 'name': name, 'file': filename,
+                       'line': line}
+                      for wall, name, filename, line in functions],
+    }
+
+def merge(data):
+    """
+    Add what was recorded in another process.
+
+    @param data: as returned by getData()
+    @type  data: dict
+    """
+    for phase, times in data['phases'].items():
+        total = _phases.setdefault(phase, [0, 0.0, 0.0])
+        total[0] = total[0] + times['count']
+        total[1] = total[1] + times['wall']
+        total[2] = total[2] + times['cpu']
+    for name, phases in data['modules'].items():
+        total = _modules.setdefault(name, {})
+        for phase, wall in phases.items():
+            total[phase] = total.get(phase, 0.0) + wall
+    for name, counts in data['handlers'].items():
+        total = _handlers.setdefault(name, [0, 0.0])
+        total[0] = total[0] + counts['count']
+        total[1] = total[1] + counts['wall']
+    for function in data['functions']:
+        entry = (function['wall'], function['name'], function['file'],
+                 function['line'])
+        if len(_functions) < SLOWEST:
+            heapq.heappush(_functions, entry)
+        else:
+            heapq.heappushpop(_functions, entry)
+
+def report(stream=None):
+    """
+    Write a report of what was recorded.
+    """
+    if stream is None:
+        stream = sys.stderr
+    data = getData()
+
+    stream.write('\nPhase                        Calls     Wall      CPU\n')
+    phases = data['phases'].items()
+    phases.sort(lambda a, b: cmp(b[1]['wall'], a[1]['wall']))
+    for phase, times in phases:
+        stream.write('%-25s %8d %8.3f %8.3f\n' % (phase, times['count'],
+                                                  times['wall'], times['cpu']))
+
+    stream.write('\nModule                                 Wall\n')
+    modules = [(sum(phases.values()), name)
+               for name, phases in data['modules'].items()]
+    modules.sort()
+    modules.reverse()
+    for wall, name in modules[:SLOWEST]:
+        stream.write('%-35s %8.3f\n' % (name, wall))
+
+    stream.write('\nOpcode handler               Calls     Wall\n')
+    handlers = data['handlers'].items()
+    handlers.sort(lambda a, b: cmp(b[1]['wall'], a[1]['wall']))
+    for name, counts in handlers:
+        stream.write('%-25s %8d %8.3f\n' % (name, counts['count'],
+                                            counts['wall']))
+
+    stream.write('\nSlowest functions                      Wall\n')
+    for function in data['functions']:
+        stream.write('%-35s %8.3f  %s:%d\n' % (function['name'],
+            function['wall'], function['file'], function['line']))
+
+def dump(filename):
+    """
+    Write what was recorded to filename as JSON.
+    """
+    try:
+        import json
+    except ImportError:
+        sys.stderr.write('Can not write %s, json is not available\n'
+                         % filename)
+        return
+
+    f = open(filename, 'w')
+    try:
+        json.dump(getData(), f, indent=1, sort_keys=True)
+    finally:
+        f.close()
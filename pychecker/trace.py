@@ -0,0 +1,196 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+"""
+Tracing of the instructions and warnings of the checked code, printed
+with the debug option and written to a file with --tracefile.
+
+Call sites check the enabled flag, or the debug option of the
+configuration in effect, before calling anything here, so nothing is
+formatted when tracing is off.
+
+The trace file has one event per line, with tab separated fields, the
+text fields escaped as with the string_escape codec:
+  - F file line name:         started checking a function
+  - N file line name:         started checking nested code of the function
+  - I offset opname [oparg operand]: checked an instruction
+  - W file line message:      added a warning
+  - E seconds instructions:   done checking the function started last
+
+read() replays a trace file, slowest() finds the slowest functions in it.
+"""
+
+import time
+
+from pychecker import utils
+
+# whether to trace
+enabled = 0
+
+# the longest repr of an operand written to the trace file
+MAX_OPERAND = 80
+
+_debug = 0
+_file = None
+_filename = None
+_started = []           # stack of (time, instruction count) per F event
+_instructions = 0
+
+
+def enable(filename=None, debug=0):
+    """
+    Start tracing.
+
+    @param filename: the file to write the trace to, if any
+    @type  filename: str or None
+    @param debug:    whether to print the trace as debug messages
+    @type  debug:    int (used as bool)
+    """
+    global enabled, _debug, _file, _filename, _instructions
+    disable()
+    _debug = debug
+    _filename = filename
+    if filename:
+        _file = open(filename, 'w')
+    _instructions = 0
+    enabled = _debug or _file is not None
+
+def disable():
+    global enabled, _file
+    enabled = 0
+    if _file is not None:
+        _file.close()
+        _file = None
+    del _started[:]
+
+def flush():
+    """
+    Flush the trace file, so a forked process does not write it again.
+    """
+    if _file is not None:
+        _file.flush()
+
+def split(suffix):
+    """
+    Continue the trace file in a file of its own, for a worker process.
+
+    @type  suffix: str
+    """
+    global _file
+    if _file is not None:
+        _file.close()
+        _file = open('%s.%s' % (_filename, suffix), 'w')
+    del _started[:]
+
+def _escape(text):
+    return str(text).encode('string_escape')
+
+def _write(*fields):
+    _file.write('\t'.join(fields) + '\n')
+
+def _debugging():
+    return _debug or utils.cfg().debug
+
+def _debugMessage(message):
+    print "DEBUG:", message
+
+def function(func_code, nested=0):
+    """
+    Start tracing the checking of a function.
+
+    @type  func_code: L{types.CodeType}
+    @param nested:    whether this is nested code, which is done when the
+                      function it is nested in is done
+    @type  nested:    int (used as bool)
+    """
+    if _file is not None:
+        _write(nested and 'N' or 'F', _escape(func_code.co_filename),
+               str(func_code.co_firstlineno), _escape(func_code.co_name))
+        if not nested:
+            _started.append((time.time(), _instructions))
+
+def done():
+    """
+    Stop tracing the function started last.
+    """
+    if _file is not None and _started:
+        started, instructions = _started.pop()
+        _write('E', '%.6f' % (time.time() - started),
+               str(_instructions - instructions))
+
+def instruction(offset, opname, oparg=None, operand=None):
+    """
+    Trace an instruction; oparg and operand are None if it has no
+    argument.
+    """
+    global _instructions
+    _instructions = _instructions + 1
+    debugging = _debugging()
+    if oparg is None:
+        if debugging:
+            _debugMessage("DIS  %d %s" % (offset, opname))
+        if _file is not None:
+            _write('I', str(offset), opname)
+    else:
+        if debugging:
+            if isinstance(operand, str):
+                shown = operand
+            else:
+                shown = repr(operand)
+            _debugMessage("DIS  %d %s %r %s" % (offset, opname, oparg, shown))
+        if _file is not None:
+            _write('I', str(offset), opname, str(oparg),
+                   _escape(repr(operand)[:MAX_OPERAND]))
+
+def warning(warning):
+    """
+    @type  warning: L{pychecker.Warning.Warning}
+    """
+    if _debugging():
+        _debugMessage('adding warning: %s' % warning.format())
+    if _file is not None:
+        _write('W', _escape(warning.file), str(warning.line),
+               _escape(warning.err))
+
+def read(filename):
+    """
+    Replay a trace file.
+
+    @rtype: generator of tuple of (str, ...)
+    @returns: the kind of each event and its fields, numbers converted
+    """
+    f = open(filename)
+    try:
+        for line in f:
+            fields = line[:-1].split('\t')
+            kind = fields[0]
+            if kind in 'FNW':
+                yield (kind, fields[1].decode('string_escape'),
+                       int(fields[2]), fields[3].decode('string_escape'))
+            elif kind == 'I':
+                if len(fields) == 3:
+                    yield (kind, int(fields[1]), fields[2])
+                else:
+                    yield (kind, int(fields[1]), fields[2], int(fields[3]),
+                           fields[4].decode('string_escape'))
+            elif kind == 'E':
+                yield (kind, float(fields[1]), int(fields[2]))
+    finally:
+        f.close()
+
+def slowest(filename, count=20):
+    """
+    @rtype:   list of tuple of (float, int, str, int, str)
+    @returns: the seconds, instructions, file, line and name of the count
+              slowest functions in the trace file, slowest first
+    """
+    functions = []
+    started = []
+    for event in read(filename):
+        if event[0] == 'F':
+            started.append(event[1:])
+        elif event[0] == 'E' and started:
+            functions.append(event[1:] + started.pop())
+    functions.sort()
+    functions.reverse()
+    return functions[:count]
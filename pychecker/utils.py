@@ -11,7 +11,6 @@ import re
 import sys
 import os
 import string
-import copy
 import imp
 import traceback
 import types
@@ -42,8 +41,7 @@ def initConfig(cfg) :
     _cfg.append(cfg)
 
 def pushConfig() :
-    newCfg = copy.copy(cfg())
-    _cfg.append(newCfg)
+    _cfg.append(Config.Layer(cfg()))
 
 def popConfig() :
     del _cfg[-1]
@@ -170,6 +168,102 @@ def _q_find_module(p, path):
                 if os.path.exists(f):
                     return _q_file(file(f)), f, ('.ptl', 'U', 1)
 
+# absolute directory -> (modification time, dict of entry name -> 1)
+_directories = {}
+# (name, path, working directory) ->
+#     (filename, (suffix, mode, type), list of (directory, modification time))
+_resolved = {}
+
+def _listDirectory(directory):
+    """
+    Return the entries in directory, only listing it again when its
+    modification time changed.
+
+    @rtype: tuple of (float, dict of str -> 1) or None if not a directory
+    """
+    key = os.path.abspath(directory or os.curdir)
+    try:
+        mtime = os.stat(key).st_mtime
+    except (OSError, TypeError, ValueError):
+        return None
+
+    listing = _directories.get(key)
+    if listing is None or listing[0] != mtime:
+        try:
+            listing = (mtime, dict.fromkeys(os.listdir(key), 1))
+        except OSError:
+            return None
+        _directories[key] = listing
+    return listing
+
+def _findInPath(name, path):
+    """
+    Find module name in path like imp.find_module, but from the directory
+    listings instead of trying to open every possible file.
+
+    @rtype: tuple of (str, tuple, list of (str, float))
+    @returns: the filename, the (suffix, mode, type) and the directories
+              looked in with their modification times
+    """
+    looked = []
+    for directory in path:
+        listing = _listDirectory(directory)
+        if listing is None:
+            continue
+        names = listing[1]
+        looked.append((directory, listing[0]))
+
+        if names.has_key(name):
+            filename = os.path.join(directory, name)
+            package = _listDirectory(filename)
+            if package is not None:
+                looked.append((filename, package[0]))
+                if package[1].has_key('__init__.py') or \
+                   package[1].has_key('__init__.pyc'):
+                    return filename, ('', '', imp.PKG_DIRECTORY), looked
+
+        for suffix, mode, moduleType in imp.get_suffixes():
+            if names.has_key(name + suffix):
+                return (os.path.join(directory, name + suffix),
+                        (suffix, mode, moduleType), looked)
+
+    raise ImportError, "No module named %s" % name
+
+def resolveModule(name, path):
+    """
+    Find the module or package name, which can not be dotted, in the
+    directories of path.  Results are kept for as long as the directories
+    looked in do not change.
+
+    @type  path: list of str
+
+    @rtype: tuple of (str, tuple)
+    @returns: the filename and the (suffix, mode, type) of the module
+    """
+    key = (name, tuple(path), os.getcwd())
+    resolved = _resolved.get(key)
+    if resolved is not None:
+        for directory, mtime in resolved[2]:
+            listing = _listDirectory(directory)
+            if listing is None or listing[0] != mtime:
+                resolved = None
+                break
+    if resolved is None:
+        resolved = _findInPath(name, path)
+        _resolved[key] = resolved
+    return resolved[0], resolved[1]
+
+def _loadPackage(name, filename, smt):
+    """
+    Load the package name found at filename, unless it is loaded already.
+
+    @rtype: L{types.ModuleType}
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        module = imp.load_module(name, None, filename, smt)
+    return module
+
 def findModule(name, moduleDir=None) :
     """Returns the result of an imp.find_module(), ie, (file, filename, smt)
        name can be a module or a package name.  It is *not* a filename."""
@@ -179,40 +273,42 @@ def findModule(name, moduleDir=None) :
         path.insert(0, moduleDir)
 
     packages = string.split(name, '.')
-    for p in packages :
-        # smt = (suffix, mode, type)
-        handle, filename, smt = _q_find_module(p, path)
-        if smt[-1] == imp.PKG_DIRECTORY :
-            try :
-                # package found - read path info from init file
-                m = imp.load_module(p, handle, filename, smt)
-            finally :
-                if handle is not None :
-                    handle.close()
+    for i in range(len(packages)) :
+        p = packages[i]
+        handle = None
+        try:
+            # smt = (suffix, mode, type)
+            filename, smt = resolveModule(p, path)
+        except ImportError:
+            if not cfg().quixote:
+                raise
+            handle, filename, smt = _q_find_module(p, path)
 
-            # importing xml plays a trick, which replaces itself with _xmlplus
-            # both have subdirs w/same name, but different modules in them
-            # we need to choose the real (replaced) version
-            if m.__name__ != p :
-                try :
-                    handle, filename, smt = _q_find_module(m.__name__, path)
-                    m = imp.load_module(p, handle, filename, smt)
-                finally :
-                    if handle is not None :
-                        handle.close()
-
-            new_path = m.__path__
-            if type(new_path) == types.ListType :
-                new_path = filename
-            if new_path not in path :
-                path.insert(1, new_path)
+        if smt[-1] == imp.PKG_DIRECTORY :
+            if i < len(packages) - 1 :
+                # load the package like importing its submodule would,
+                # as the submodule can import from it
+                packageName = string.join(packages[:i + 1], '.')
+                m = _loadPackage(packageName, filename, smt)
+
+                # importing xml plays a trick, which replaces itself with
+                # _xmlplus; both have subdirs w/same name, but different
+                # modules in them, we need to choose the real (replaced) one
+                if m.__name__ != packageName :
+                    filename, smt = resolveModule(m.__name__, path)
+
+            # look for the submodules in the package directory
+            if filename not in path :
+                path.insert(1, filename)
         elif smt[-1] != imp.PY_COMPILED:
-            if p is not packages[-1] :
+            if i < len(packages) - 1 :
                 if handle is not None :
                     handle.close()
                 raise ImportError, "No module named %s" % packages[-1]
-            return handle, filename, smt
+            break
 
+    if handle is None and smt[-1] != imp.PKG_DIRECTORY :
+        handle = open(filename, smt[1])
     # in case we have been given a package to check
     return handle, filename, smt
 
@@ -13,14 +13,20 @@ import sys
 import string
 import types
 import traceback
-import imp
 import re
+import time
+import heapq
+import functools
+import UserString
 
 from pychecker import OP
 from pychecker import Stack
 from pychecker import function
 from pychecker import python
 from pychecker import pcmodules
+from pychecker import static
+from pychecker import stats
+from pychecker import trace
 
 from pychecker import msgs
 from pychecker import utils
@@ -86,7 +92,7 @@ def _checkReturnWarnings(code) :
 
     # there must be at least 2 real return values to check for consistency
     returnValuesLen = len(code.returnValues)
-    if returnValuesLen < 2 :
+    if returnValuesLen < 2 or not cfg().warns(msgs.INCONSISTENT_RETURN_TYPE) :
         return
 
     # if the last return is implicit, check if there are non None returns
@@ -144,8 +150,106 @@ def _checkComplex(code, maxValue, value, func, err) :
         code.addWarning(err % (func.function.__name__, value), line)
 
 
+# instructions checked between looking at the time and limits again
+_BUDGET_INTERVAL = 256
+
+# when checking the current module started, and whether it ran out of time
+_moduleStarted = None
+_moduleTruncated = 0
+
+class _Budget:
+    """
+    The instructions and time left for checking a function, including its
+    nested code, and the time left for the module being checked.
+
+    The limits are read from the config every so often, so a __pychecker__
+    in the function can raise or lower them.
+
+    @ivar granted:   the number of instructions allowed so far
+    @type granted:   int
+    @ivar left:      the number of instructions to check before looking at
+                     the limits again
+    @type left:      int
+    @ivar truncated: whether a limit was exceeded
+    @type truncated: int (used as bool)
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.granted = 0
+        self.left = 0
+        self.truncated = 0
+
+    def renew(self):
+        """
+        Called when the instructions granted so far were checked.
+
+        @rtype:   int
+        @returns: the number of instructions to check next, 0 if a limit
+                  was exceeded
+        """
+        global _moduleTruncated
+        if self.truncated:
+            return 0
+
+        maxInstructions = cfg().maxInstructions
+        maxMilliseconds = cfg().maxMilliseconds
+        maxModuleMilliseconds = cfg().maxModuleMilliseconds
+        now = time.time()
+        if (maxInstructions and self.granted >= maxInstructions) or \
+           (maxMilliseconds and
+            (now - self.started) * 1000 >= maxMilliseconds):
+            self.truncated = 1
+        elif maxModuleMilliseconds and _moduleStarted is not None and \
+             (now - _moduleStarted) * 1000 >= maxModuleMilliseconds:
+            self.truncated = 1
+            _moduleTruncated = 1
+        if self.truncated:
+            return 0
+
+        grant = _BUDGET_INTERVAL
+        if maxInstructions:
+            grant = min(grant, maxInstructions - self.granted)
+        self.granted = self.granted + grant
+        return grant
+
+    def used(self):
+        """
+        @rtype:   tuple of (int, int)
+        @returns: the instructions checked and milliseconds spent so far
+        """
+        return (self.granted - self.left,
+                int((time.time() - self.started) * 1000))
+
+def _referenceNames(func_code, globalRefs):
+    """
+    Count all names used by the code and its nested code as referenced,
+    for code which was not completely checked.
+    """
+    for name in func_code.co_names:
+        globalRefs[name] = name
+    for const in func_code.co_consts:
+        if type(const) == types.CodeType:
+            _referenceNames(const, globalRefs)
+
 def _checkCode(code, codeSource) :
+    budget = codeSource.budget
+    left = budget.left
+    runs = code.instructions.constantRuns
     while code.index < code.maxCode :
+        if left <= 0 :
+            left = budget.renew()
+            if left <= 0 :
+                break
+        # a run longer than the budget left is checked op by op, so no
+        # more instructions are checked than were granted
+        if runs and runs.has_key(code.opIndex) and \
+           runs[code.opIndex] - code.opIndex <= left :
+            end = runs[code.opIndex]
+            left = left - (end - code.opIndex)
+            code.popConstantRun(end)
+            continue
+        left = left - 1
         op, oparg, operand = code.popNextOp()
         dispatch_func = CodeChecks.DISPATCH[op]
         if dispatch_func is not None :
@@ -153,6 +257,7 @@ def _checkCode(code, codeSource) :
                 dispatch_func(oparg, operand, codeSource, code)
             except NotImplementedError :
                 raise NotImplementedError('No DISPATCH member for op %r' % op)
+    budget.left = left
 
 def _name_unused(var) :
     if var in cfg().unusedNames :
@@ -180,6 +285,8 @@ def _handleNestedCode(func_code, code, codeSource):
     if func_code.co_name == utils.LAMBDA or nested:
         utils.debug(' handling nested code %s under %r for %r',
             func_code.co_name, codeSource.func, code.func)
+        if trace.enabled:
+            trace.function(func_code, nested=1)
         varnames = None
         if nested and func_code.co_name != utils.LAMBDA:
             varnames = func_code.co_varnames + \
@@ -225,14 +332,60 @@ def _findUnreachableCode(code) :
         del code.returnValues[-1]
         del unreachable[lastIndex]
 
-    if cfg().unreachableCode :
+    if cfg().unreachableCode and cfg().warns(msgs.CODE_UNREACHABLE) :
+        instructions = code.instructions
         for index in unreachable.keys() :
-            try :
-                if not OP.JUMP_FORWARD(ord(code.bytes[index])) :
-                    code.addWarning(msgs.CODE_UNREACHABLE, unreachable[index])
-            except IndexError :
-                pass
+            number = instructions.numbers.get(index)
+            if number is None or number >= len(instructions) :
+                continue
+            if not OP.JUMP_FORWARD(instructions.ops[number]) :
+                code.addWarning(msgs.CODE_UNREACHABLE, unreachable[index])
+
+
+def _checkCompleted(code, func, main, in_class) :
+    """
+    The checks which need all of the code of a function to have been
+    checked.
+
+    @type  code:     L{CodeChecks.Code}
+    @type  func:     L{function.Function}
+    @type  main:     int (used as bool)
+    @type  in_class: int (used as bool)
+    """
+    if cfg().checkReturnValues :
+        _checkReturnWarnings(code)
 
+    if cfg().localVariablesUsed and cfg().warns(msgs.UNUSED_LOCAL) :
+        for var, line in code.unusedLocals.items() :
+            if line is not None and line > 0 and _name_unused(var) :
+                code.addWarning(msgs.UNUSED_LOCAL % var, line)
+
+    if cfg().argumentsUsed and cfg().warns(msgs.UNUSED_PARAMETER) :
+        op = code.getFirstOp()
+        if not (OP.RAISE_VARARGS(op) or OP.RETURN_VALUE(op)) :
+            for var, line in code.unusedLocals.items() :
+                _checkUnusedParam(var, line, func, code)
+
+    if not cfg().warns(msgs.Style) :
+        return
+
+    # Check code complexity:
+    #   loops should be counted as one branch, but there are typically 3
+    #   branches in byte code to setup a loop, so subtract off 2/3's of them
+    #    / 2 to approximate real branches
+    branches = (len(code.branches.keys()) - (2 * code.loops)) / 2
+    lines = (code.getLineNum() - code.func_code.co_firstlineno)
+    returns = len(code.returnValues)
+    if not main and not in_class :
+        args = code.func_code.co_argcount
+        localCount = len(code.func_code.co_varnames) - args
+        _checkComplex(code, cfg().maxArgs, args, func, msgs.TOO_MANY_ARGS)
+        _checkComplex(code, cfg().maxLocals, localCount, func,
+            msgs.TOO_MANY_LOCALS)
+        _checkComplex(code, cfg().maxLines, lines, func, msgs.FUNC_TOO_LONG)
+    _checkComplex(code, cfg().maxReturns, returns, func, msgs.TOO_MANY_RETURNS)
+    _checkComplex(code, cfg().maxBranches, branches, func,
+        msgs.TOO_MANY_BRANCHES)
 
 def _checkFunction(module, func, classObject=None, main=0, in_class=0):
     """
@@ -249,6 +402,11 @@ def _checkFunction(module, func, classObject=None, main=0, in_class=0):
     @type  in_class:    int (used as bool)
     """
 
+    if stats.enabled:
+        started = stats.start()
+    if trace.enabled:
+        trace.function(func.function.func_code)
+
     # always push a new config object, so we can pop at end of function
     utils.pushConfig()
 
@@ -259,16 +417,21 @@ def _checkFunction(module, func, classObject=None, main=0, in_class=0):
             code.unusedLocals[key] = -1
     codeSource = CodeChecks.CodeSource(
         module, func, classObject, main, in_class, code)
-    module.codes.append(code)
+    budget = codeSource.budget = _Budget()
+    # the code state is dropped once its summary is returned, unless kept
+    if cfg().keepCodes:
+        module.codes.append(code)
 
     try :
         _checkCode(code, codeSource)
-        if not in_class :
+        if not in_class and not budget.truncated :
             _findUnreachableCode(code)
 
         # handle lambdas and nested functions
         codeSource.calling_code.append(func)
         for key in code.codeOrder:
+            if budget.truncated :
+                break
             func_code = code.codeObjects[key]
             _handleNestedCode(func_code, code, codeSource)
         del codeSource.calling_code[-1]
@@ -284,41 +447,28 @@ def _checkFunction(module, func, classObject=None, main=0, in_class=0):
             exc_list[index] = string.replace(exc_list[index], "\n", "\n\t")
         code.addWarning(msgs.CHECKER_BROKEN % string.join(exc_list, ""))
 
-    if cfg().checkReturnValues :
-        _checkReturnWarnings(code)
-
-    if cfg().localVariablesUsed :
-        for var, line in code.unusedLocals.items() :
-            if line is not None and line > 0 and _name_unused(var) :
-                code.addWarning(msgs.UNUSED_LOCAL % var, line)
-
-    if cfg().argumentsUsed :
-        op = code.getFirstOp()
-        if not (OP.RAISE_VARARGS(op) or OP.RETURN_VALUE(op)) :
-            for var, line in code.unusedLocals.items() :
-                _checkUnusedParam(var, line, func, code)
-
-    # Check code complexity:
-    #   loops should be counted as one branch, but there are typically 3
-    #   branches in byte code to setup a loop, so subtract off 2/3's of them
-    #    / 2 to approximate real branches
-    branches = (len(code.branches.keys()) - (2 * code.loops)) / 2
-    lines = (code.getLineNum() - code.func_code.co_firstlineno)
-    returns = len(code.returnValues)
-    if not main and not in_class :
-        args = code.func_code.co_argcount
-        localCount = len(code.func_code.co_varnames) - args
-        _checkComplex(code, cfg().maxArgs, args, func, msgs.TOO_MANY_ARGS)
-        _checkComplex(code, cfg().maxLocals, localCount, func,
-            msgs.TOO_MANY_LOCALS)
-        _checkComplex(code, cfg().maxLines, lines, func, msgs.FUNC_TOO_LONG)
-    _checkComplex(code, cfg().maxReturns, returns, func, msgs.TOO_MANY_RETURNS)
-    _checkComplex(code, cfg().maxBranches, branches, func,
-        msgs.TOO_MANY_BRANCHES)
+    if budget.truncated :
+        # the state of the code is incomplete, so only report that
+        _referenceNames(code.func_code, code.globalRefs)
+        code.returnValues = None
+        if not _moduleTruncated :
+            instructions, milliseconds = budget.used()
+            code.addWarning(msgs.ANALYSIS_TRUNCATED %
+                            (func.function.__name__, instructions,
+                             milliseconds), code.func_code)
+    else :
+        _checkCompleted(code, func, main, in_class)
 
     if not (main or in_class) :
         utils.popConfig()
     func.returnValues = code.returnValues
+    if stats.enabled:
+        name = None
+        if classObject is not None:
+            name = '%s.%s' % (classObject.name, code.func_code.co_name)
+        stats.addFunction(started, code.func_code, name)
+    if trace.enabled:
+        trace.done()
     # FIXME: I don't think code.codeObjects.values() ever gets used,
     # but if it does, and needs to be in order, then use code.codeOrder here.
     # FIXME: should this not be returning copies of globalRefs ?
@@ -401,7 +551,10 @@ def _baseInitCalled(classInitInfo, base, functionsCalled) :
             # (.so)
             obj = sys.modules[names[0]]
         except KeyError:
-            return 1
+            # modules loaded without running them are not in sys.modules
+            obj = cfg().static and static.getModule(names[0])
+            if not obj:
+                return 1
     for i in range(1, len(names)) :
         obj = getattr(obj, names[i], None)
         if obj is None:
@@ -422,6 +575,9 @@ def _checkBaseClassInit(moduleFilename, c, func_code, funcInfo) :
 
     warnings = []
     functionsCalled, _, returnValues = funcInfo
+    if returnValues is None :
+        # the code was not completely checked
+        return warnings
     for line, stackItem, dummy in returnValues :
         if stackItem.data != None :
             if not stackItem.isNone() or cfg().returnNoneFromInit :
@@ -481,13 +637,8 @@ def getBlackList(moduleList) :
         if badBoy[-3:] == ".py":
             badBoy = badBoy[0:-3]
         try :
-            handle, path, flags = imp.find_module(badBoy)
-            if handle:
-                handle.close()
-            # apparently, imp.find_module can return None, path, (triple)
-            # This happened to me with twisted 2.2.0 in a separate path
-            if path:
-                blacklist.append(normalize_path(path))
+            path, flags = utils.resolveModule(badBoy, sys.path)
+            blacklist.append(normalize_path(path))
         except ImportError :
             pass
     return blacklist
@@ -518,6 +669,69 @@ def getStandardLibraries() :
 def normalize_path(path):
     return os.path.normpath(os.path.normcase(path))
 
+class _WarningFilter:
+    """
+    Decide which warnings to keep, as they are found.  Whether to keep the
+    warnings for a file is only worked out once for every file.
+
+    @ivar prefixes: the normalized paths not to warn for, by length
+    @type prefixes: dict of int -> dict of str -> 1
+    @ivar files:    whether to keep the warnings for a filename
+    @type files:    dict of str -> int (used as bool)
+    """
+
+    def __init__(self, blacklist, std_lib, cfg):
+        """
+        @param blacklist: list of absolute paths not to warn for
+        @type  blacklist: list of str
+        @param std_lib:   list of standard library directories
+        @type  std_lib:   list of str or None
+        @type  cfg:       L{Config.Config}
+        """
+        self.prefixes = {}
+        paths = blacklist[:]
+        if std_lib:
+            paths.extend([normalize_path(p) for p in std_lib])
+        for path in paths:
+            self.prefixes.setdefault(len(path), {})[path] = 1
+        # like blacklisted paths, --only does not apply with std_lib
+        self.only = cfg.only and not std_lib
+        self.cfgFiles = cfg.files
+        self.level = cfg.level
+        self.files = {}
+
+    def _keepFile(self, file):
+        filename = normalize_path(file)
+        for length, paths in self.prefixes.items():
+            if paths.has_key(filename[:length]):
+                return 0
+        # ignore files not specified on the cmd line if requested
+        if self.only and os.path.abspath(filename) not in self.cfgFiles:
+            return 0
+        return 1
+
+    def keep(self, warning):
+        """
+        @type warning: L{Warning}
+
+        @rtype: int (used as bool)
+        """
+        # filter by warning/error level if requested
+        if self.level and warning.level < self.level:
+            return 0
+        keep = self.files.get(warning.file)
+        if keep is None:
+            keep = self.files[warning.file] = self._keepFile(warning.file)
+        return keep
+
+    def filter(self, warnings):
+        """
+        @type warnings: list of L{Warning}
+
+        @rtype: list of L{Warning}
+        """
+        return [warning for warning in warnings if self.keep(warning)]
+
 def removeWarnings(warnings, blacklist, std_lib, cfg):
     """
     @param blacklist: list of absolute paths not to warn for
@@ -527,60 +741,57 @@ def removeWarnings(warnings, blacklist, std_lib, cfg):
     """
     utils.debug('filtering %d warnings with blacklist', len(warnings))
 
-    if std_lib is not None:
-        std_lib = [normalize_path(p) for p in std_lib]
-    for index in range(len(warnings) - 1, -1, -1):
-        filename = normalize_path(warnings[index].file)
-        # the blacklist contains paths to packages and modules we do not
-        # want warnings for
-        # when we find a match, make sure we continue the warnings for loop
-        found = False
-        for path in blacklist:
-            if not found and filename.startswith(path):
-                found = True
-                del warnings[index]
-        if found:
-            continue
-        if std_lib:
-            found = False
-            for path in std_lib:
-                if not found and utils.startswith(filename, path) :
-                    found = True
-                    del warnings[index]
-            if found:
-                continue
-        elif cfg.only:
-            # ignore files not specified on the cmd line if requested
-            if os.path.abspath(filename) not in cfg.files:
-                del warnings[index]
-                continue
-
-        # filter by warning/error level if requested
-        if cfg.level and warnings[index].level < cfg.level:
-            del warnings[index]
-
+    warnings[:] = _WarningFilter(blacklist, std_lib, cfg).filter(warnings)
     if cfg.limit:
-        # sort by severity first, then normal sort (by file/line)
-        warnings.sort(lambda a, b: cmp(a.level, b.level) or cmp(a, b))
+        limitWarnings(warnings, cfg.limit)
 
-        # strip duplicates
-        lastWarning = None
-        for index in range(len(warnings)-1, -1, -1):
-            warning = warnings[index]
+    utils.debug('kept %d warnings with blacklist', len(warnings))
 
-            # remove duplicate warnings
-            if lastWarning is not None and cmp(lastWarning, warning) == 0:
-                del warnings[index]
-            else:
-                lastWarning = warning
+    return warnings
 
-        num_ignored = len(warnings) - cfg.limit
-        if num_ignored > 0:
-            del warnings[:-cfg.limit]
-            msg = msgs.TOO_MANY_WARNINGS % num_ignored
-            warnings.append(Warning('', 0, msg))
+def _getDuplicateKey(warning):
+    """
+    @returns: a key which is the same for warnings comparing equal
+    """
+    # warnings without file and line never compare equal
+    if not warning.file and not warning.line:
+        return id(warning)
+    err = warning.err
+    if isinstance(err, UserString.UserString):
+        err = err.data
+    elif not isinstance(err, types.StringTypes):
+        # message classes compare by identity
+        err = id(err)
+    return warning.file, warning.line, err
+
+def _cmpSeverity(a, b):
+    # by severity first, then normal sort (by file/line)
+    return cmp(a.level, b.level) or cmp(a, b)
+
+_severityKey = functools.cmp_to_key(_cmpSeverity)
+
+def limitWarnings(warnings, limit):
+    """
+    Keep only the limit most severe warnings, dropping duplicates, and
+    add a warning telling how many were ignored.
 
-    utils.debug('kept %d warnings with blacklist', len(warnings))
+    @type  warnings: list of L{Warning}
+    @type  limit:    int
+    """
+    unique = {}
+    for warning in warnings:
+        unique.setdefault(_getDuplicateKey(warning), warning)
+    warnings[:] = unique.values()
+
+    num_ignored = len(warnings) - limit
+    if num_ignored > 0:
+        # only keep the limit most severe ones on a heap
+        warnings[:] = heapq.nlargest(limit, warnings, _severityKey)
+        warnings.reverse()
+        msg = msgs.TOO_MANY_WARNINGS % num_ignored
+        warnings.append(Warning('', 0, msg))
+    else:
+        warnings.sort(_cmpSeverity)
 
     return warnings
 
@@ -595,6 +806,106 @@ def _updateSuppressions(suppress, warnings) :
 
 _CLASS_NAME_RE = re.compile("<class '([A-Za-z0-9.]+)'>(\\..+)?")
 
+# patterns which can not be combined with others: inline flags apply to
+# the whole combined pattern, and group references would refer to the
+# wrong group
+_UNCOMBINABLE_RE = re.compile(r'\(\?[iLmsux]|\\[1-9]|\(\?P=')
+
+# python's re module supports at most 100 groups in a pattern
+_MAX_GROUPS = 99
+
+class _SuppressionMatcher:
+    """
+    Suppressions compiled once for matching the names of all modules,
+    classes and functions.  The regexs which can be are combined in a few
+    patterns, so a name none of them matches is rejected in one pass.
+
+    @ivar names:    name -> suppression options
+    @type names:    dict of str -> str
+    @ivar regexs:   (regex, options, whether it is in a combined pattern),
+                    in the order they are applied
+    @type regexs:   list of (_sre.SRE_Pattern, str, int)
+    @ivar combined: patterns matching any name one of the combined regexs
+                    may match
+    @type combined: list of _sre.SRE_Pattern
+    """
+
+    def __init__(self, suppressions):
+        """
+        @type suppressions: tuple of (dict of str -> str,
+                                      dict of _sre.SRE_Pattern -> str)
+        """
+        self.names = suppressions[0]
+
+        regexs = [(regex.pattern, regex, options)
+                  for regex, options in suppressions[1].items()]
+        regexs.sort()
+
+        self.regexs = []
+        self.combined = []
+        chunk, groups = [], 0
+        for pattern, regex, options in regexs + [(None, None, None)]:
+            if pattern is None or groups + regex.groups > _MAX_GROUPS:
+                self._combine(chunk)
+                chunk, groups = [], 0
+            if pattern is None:
+                break
+            if _UNCOMBINABLE_RE.search(pattern):
+                self.regexs.append([regex, options, 0])
+            else:
+                entry = [regex, options, 1]
+                self.regexs.append(entry)
+                chunk.append(entry)
+                groups = groups + regex.groups
+
+    def _combine(self, entries):
+        if not entries:
+            return
+        patterns = ['(?:%s)\\Z' % entry[0].pattern for entry in entries]
+        try:
+            self.combined.append(re.compile(string.join(patterns, '|')))
+        except (re.error, AssertionError, OverflowError):
+            for entry in entries:
+                entry[2] = 0
+
+    def matchRegexs(self, name):
+        """
+        @rtype:   list of str
+        @returns: the options of all regexs matching the whole name
+        """
+        combinedMatch = 0
+        for combined in self.combined:
+            if combined.match(name):
+                combinedMatch = 1
+                break
+
+        options = []
+        for regex, regexOptions, isCombined in self.regexs:
+            if isCombined and not combinedMatch:
+                continue
+            match = regex.match(name)
+            if match and match.group() == name:
+                options.append(regexOptions)
+        return options
+
+_suppressionMatcher = None
+
+def _getSuppressionMatcher(suppressions):
+    """
+    Return the matcher for suppressions, only compiling it again when
+    given different suppressions.
+
+    @rtype: L{_SuppressionMatcher}
+    """
+    global _suppressionMatcher
+    sizes = len(suppressions[0]), len(suppressions[1])
+    if _suppressionMatcher is None or \
+       _suppressionMatcher[0] is not suppressions or \
+       _suppressionMatcher[1] != sizes:
+        _suppressionMatcher = (suppressions, sizes,
+                               _SuppressionMatcher(suppressions))
+    return _suppressionMatcher[2]
+
 def getSuppression(name, suppressions, warnings):
     """
     @type  name:         str
@@ -605,36 +916,39 @@ def getSuppression(name, suppressions, warnings):
     @returns: the suppression options for the given name
     @rtype:   str
     """
-    try:
-        utils.pushConfig()
+    matcher = _getSuppressionMatcher(suppressions)
 
-        # cheesy hack to deal with new-style classes.  i don't see a
-        # better way to get the name, '<' is an invalid identifier, so
-        # we can reliably check it and extract name from:
-        # <class 'class-name'>[.identifier[.identifier]...]
+    # cheesy hack to deal with new-style classes.  i don't see a
+    # better way to get the name, '<' is an invalid identifier, so
+    # we can reliably check it and extract name from:
+    # <class 'class-name'>[.identifier[.identifier]...]
+    if name[:1] == '<':
         matches = _CLASS_NAME_RE.match(name)
         if matches:
             # pull out the names and make a complete identifier (ignore None)
             name = string.join(filter(None, matches.groups()), '')
 
-        suppress = suppressions[0].get(name, None)
-        if suppress is not None:
-            _updateSuppressions(suppress, warnings)
+    updates = []
+    suppress = matcher.names.get(name, None)
+    if suppress is not None:
+        updates.append(suppress)
 
-        regexList = suppressions[1].keys()
-        regexList.sort()
-        for regex in regexList:
-            match = regex.match(name)
-            if match and match.group() == name:
-                suppress = 1
-                _updateSuppressions(suppressions[1][regex], warnings)
-
-        if not suppress :
-            utils.popConfig()
+    regexUpdates = matcher.matchRegexs(name)
+    if regexUpdates:
+        suppress = 1
+        updates.extend(regexUpdates)
 
+    # only push a config when there is something to change in it
+    if not suppress :
         return suppress
+
+    utils.pushConfig()
+    try:
+        for update in updates:
+            _updateSuppressions(update, warnings)
     except _SuppressionError :
         return None
+    return suppress
 
 def _findFunctionWarnings(module, globalRefs, warnings, suppressions) :
     """
@@ -649,7 +963,8 @@ def _findFunctionWarnings(module, globalRefs, warnings, suppressions) :
 
         name = '%s.%s' % (module.moduleName, func.function.__name__)
         suppress = getSuppression(name, suppressions, warnings)
-        if cfg().noDocFunc and func.function.__doc__ == None :
+        if cfg().noDocFunc and cfg().warns(msgs.NO_FUNC_DOC) and \
+           func.function.__doc__ == None :
             err = msgs.NO_FUNC_DOC % func.function.__name__
             # FIXME: is there a good reason why this passes func_code as line ?
             warnings.append(Warning(module.filename(), func_code, err))
@@ -742,10 +1057,12 @@ def _findClassWarnings(module, c, class_code,
                 if err is not None:
                     warnings.append(Warning(filename, func_code, err))
                 
-        if cfg().checkOverridenMethods :
+        if cfg().checkOverridenMethods and \
+           cfg().warns(msgs.METHOD_SIGNATURE_MISMATCH) :
             _checkOverridenMethods(method.function, baseClasses, warnings)
 
-        if cfg().noDocFunc and method.function.__doc__ == None :
+        if cfg().noDocFunc and cfg().warns(msgs.NO_FUNC_DOC) and \
+           method.function.__doc__ == None :
             err = msgs.NO_FUNC_DOC % method.function.__name__
             # FIXME: is there a good reason why this passes func_code as line ?
             warnings.append(Warning(filename, func_code, err))
@@ -764,7 +1081,8 @@ def _findClassWarnings(module, c, class_code,
         if methodSuppress is not None :
             utils.popConfig()
 
-    if c.memberRefs and cfg().membersUsed :
+    if c.memberRefs and cfg().membersUsed and \
+       cfg().warns(msgs.UNUSED_MEMBERS) :
         memberList = c.memberRefs.keys()
         memberList.sort()
         err = msgs.UNUSED_MEMBERS % (string.join(memberList, ', '), c.name)
@@ -787,7 +1105,7 @@ def _findClassWarnings(module, c, class_code,
                 if len(slots.data) == 0:
                     err = msgs.EMPTY_SLOTS % c.name
                     warnings.append(Warning(filename, lineNum, err))
-            except AttributeError:
+            except (AttributeError, TypeError):
                 # happens when slots is an instance of a class w/o __len__
                 pass
 
@@ -810,7 +1128,8 @@ def _findClassWarnings(module, c, class_code,
             err = msgs.USING_NEW_STYLE_METHOD_IN_OLD_CLASS % (newClassMethodName, c.name)
             warnings.append(Warning(filename, lineNum, err))
 
-    if cfg().noDocClass and c.classObject.__doc__ == None :
+    if cfg().noDocClass and cfg().warns(msgs.NO_CLASS_DOC) and \
+       c.classObject.__doc__ == None :
         method = c.methods.get(utils.INIT, None)
         if method != None :
             func_code = method.function.func_code
@@ -829,28 +1148,79 @@ def _findClassWarnings(module, c, class_code,
         utils.popConfig()
 
 
+def _sortUnique(warnings):
+    """
+    Sort the warnings, dropping duplicates.
+
+    @type warnings: list of L{Warning}
+    """
+    warnings.sort()
+    for index in range(len(warnings) - 1, 0, -1):
+        if cmp(warnings[index - 1], warnings[index]) == 0:
+            del warnings[index]
+    return warnings
+
 def find(moduleList, initialCfg, suppressions=None):
     "Return a list of warnings found in the module list"
 
+    found = []
+    for module, warnings in findByModule(moduleList, initialCfg,
+                                         suppressions):
+        found.extend(warnings)
+
+    if cfg().limit:
+        if stats.enabled:
+            started = stats.start()
+        limitWarnings(found, cfg().limit)
+        if stats.enabled:
+            stats.addPhase('filter', started)
+
+    utils.debug('Found %d warnings in %d modules' % (len(found), len(moduleList)))
+    return found
+
+def findByModule(moduleList, initialCfg, suppressions=None):
+    """
+    Generate the warnings found in each module of the list as soon as the
+    module is checked, filtered, sorted and without duplicates.  The limit
+    of warnings is not applied.
+
+    @type  moduleList:   list of L{pcmodules.PyCheckerModule}
+    @type  initialCfg:   L{Config.Config}
+    @param suppressions: tuple of suppressions, suppressionRegexs dicts
+
+    @rtype: generator of (L{pcmodules.PyCheckerModule}, list of L{Warning})
+    """
+    global _moduleStarted, _moduleTruncated
+
     if suppressions is None :
         suppressions = {}, {}
 
     utils.initConfig(initialCfg)
     utils.debug('Finding warnings in %d modules' % len(moduleList))
 
-    warnings = []
+    std_lib = None
+    if cfg().ignoreStandardLibrary:
+        std_lib = getStandardLibraries()
+    warningFilter = _WarningFilter(getBlackList(cfg().blacklist), std_lib,
+                                   cfg())
+
     before = 0
 
     for module in moduleList :
         if module.moduleName in cfg().blacklist :
             continue
 
+        warnings = []
         modSuppress = getSuppression(module.moduleName, suppressions, warnings)
         globalRefs, classCodes = {}, {}
+        _moduleStarted = time.time()
+        _moduleTruncated = 0
 
         # mainCode can be null if there was a syntax error
         if module.mainCode != None :
             utils.debug("module:", module)
+            if stats.enabled:
+                started = stats.start()
             before = len(warnings)
             funcInfo = _updateFunctionWarnings(module, module.mainCode,
                                                None, warnings, globalRefs, 1)
@@ -861,12 +1231,19 @@ def find(moduleList, initialCfg, suppressions=None):
 
             for code in funcInfo[1] :
                 classCodes[code.co_name] = code
+            if stats.enabled:
+                stats.addPhase('main code', started, module.moduleName)
 
+        if stats.enabled:
+            started = stats.start()
         before = len(warnings)
         _findFunctionWarnings(module, globalRefs, warnings, suppressions)
         if before != len(warnings):
             utils.debug("module: %r functions triggered %d warnings", module,
                 len(warnings) - before)
+        if stats.enabled:
+            stats.addPhase('functions', started, module.moduleName)
+            started = stats.start()
 
         before = len(warnings)
         for c in module.classes.values():
@@ -875,14 +1252,18 @@ def find(moduleList, initialCfg, suppressions=None):
         if before != len(warnings):
             utils.debug("module: %r classes triggered %d warnings", module,
                 len(warnings) - before)
+        if stats.enabled:
+            stats.addPhase('classes', started, module.moduleName)
+            started = stats.start()
 
-        if cfg().noDocModule and \
+        if cfg().noDocModule and cfg().warns(msgs.NO_MODULE_DOC) and \
            module.module != None and module.module.__doc__ == None:
             warnings.append(Warning(module.filename(), 1, msgs.NO_MODULE_DOC))
             utils.debug("module: %r module doc triggered 1 warning")
 
         before = len(warnings)
-        if cfg().allVariablesUsed or cfg().privateVariableUsed:
+        if (cfg().allVariablesUsed or cfg().privateVariableUsed) and \
+           cfg().warns(msgs.VAR_NOT_USED):
             prefix = None
             if not cfg().allVariablesUsed:
                 prefix = "_"
@@ -895,7 +1276,7 @@ def find(moduleList, initialCfg, suppressions=None):
                 module, len(warnings) - before)
 
         before = len(warnings)
-        if cfg().importUsed:
+        if cfg().importUsed and cfg().warns(msgs.IMPORT_NOT_USED):
             if module.moduleName != utils.INIT or cfg().packageImportUsed:
                 # always ignore readline module, if [raw_]input() is used
                 if globalRefs.has_key('input') or \
@@ -907,6 +1288,13 @@ def find(moduleList, initialCfg, suppressions=None):
             utils.debug("module: %r unused imports triggered %d warnings",
                 module, len(warnings) - before)
 
+        if _moduleTruncated :
+            milliseconds = int((time.time() - _moduleStarted) * 1000)
+            err = msgs.MODULE_ANALYSIS_TRUNCATED % (module.moduleName,
+                                                    milliseconds)
+            warnings.append(Warning(module.filename(), 1, err))
+        _moduleStarted = None
+
         # we have to do this here, b/c checkFunction doesn't popConfig for
         # classes this allows us to have __pychecker__ apply to all methods
         # when defined at class scope
@@ -915,14 +1303,13 @@ def find(moduleList, initialCfg, suppressions=None):
         if modSuppress is not None:
             utils.popConfig()
 
-    std_lib = None
-    if cfg().ignoreStandardLibrary:
-        std_lib = getStandardLibraries()
-
-    ret = removeWarnings(warnings, getBlackList(cfg().blacklist), std_lib,
-                          cfg())
-    utils.debug('Found %d warnings in %d modules' % (len(ret), len(moduleList)))
-    return ret
+        if stats.enabled:
+            stats.addPhase('unused', started, module.moduleName)
+            started = stats.start()
+        warnings = _sortUnique(warningFilter.filter(warnings))
+        if stats.enabled:
+            stats.addPhase('filter', started, module.moduleName)
+        yield module, warnings
 
 
 if 0:
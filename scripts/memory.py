@@ -0,0 +1,41 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+# Report the peak memory and time used to check a set of modules.
+#
+# Run this from the main directory as
+#   python scripts/memory.py [-c checker.py] [file ...]
+# By default the test_input files are checked with this tree's checker;
+# give the checker.py of another checkout to compare before and after.
+
+import os
+import sys
+import glob
+import time
+import getopt
+import resource
+import subprocess
+
+def main(argv):
+    opts, files = getopt.getopt(argv[1:], 'c:')
+    checker = os.path.join('pychecker', 'checker.py')
+    for opt, value in opts:
+        if opt == '-c':
+            checker = value
+    if not files:
+        files = glob.glob(os.path.join('test_input', 'test*.py'))
+        files.sort()
+
+    null = open(os.devnull, 'w')
+    started = time.time()
+    subprocess.call([sys.executable, checker, '-Q', '--limit', '0'] + files,
+                    stdout=null, stderr=subprocess.STDOUT)
+    elapsed = time.time() - started
+
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print '%s: %d files, peak RSS %d KB, %.2f s' % (checker, len(files),
+                                                    peak, elapsed)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -55,13 +55,15 @@ class TestCase(unittest.TestCase):
         """
         return self.checkMultiple(testname, [testname + '.py'], args)
 
-    def checkMultiple(self, testname, checkables, args=''):
+    def getOutput(self, checkables, args=''):
         """
-        Run pychecker on the given test, located in input/
-        Will compare to output of the same name in expected/
+        Run pychecker on the given files, located in input/
 
         @type args:       str
         @type checkables: list of str
+
+        @rtype: str
+        @returns: the output and error output of pychecker
         """
         abstestdir = os.path.dirname(__file__)
         abspycheckerdir = os.path.dirname(abstestdir)
@@ -78,7 +80,18 @@ class TestCase(unittest.TestCase):
             "%s %s" % (abstestdir, pycheckerpy, args, " ".join(testfiles))
         # getoutput output never ends on a newline the way
         # pychecker ... > expected/... would
-        output = commands.getoutput(cmd) + '\n'
+        return commands.getoutput(cmd) + '\n'
+
+    def checkMultiple(self, testname, checkables, args=''):
+        """
+        Run pychecker on the given test, located in input/
+        Will compare to output of the same name in expected/
+
+        @type args:       str
+        @type checkables: list of str
+        """
+        abstestdir = os.path.dirname(__file__)
+        output = self.getOutput(checkables, args)
         
         # here we can select a different file based on os/python version/arch
         relexpectedfile = os.path.join('expected', testname)
@@ -0,0 +1,7 @@
+'a dependency using a builtin module'
+
+import __builtin__
+
+def isObject(c):
+    'return whether c is object'
+    return c is __builtin__.object
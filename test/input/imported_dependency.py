@@ -0,0 +1,7 @@
+'a dependency importing a module'
+
+import string
+
+def join(words):
+    'join the words'
+    return string.join(words)
@@ -0,0 +1,24 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'test the limits on checking a function'
+
+import os
+
+def table():
+    'only the start of this function is checked'
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
+    value = 1
+    return os.path.join(values)
+
+def raised():
+    'the limit is raised for this function'
+    __pychecker__ = 'maxinstructions=1000'
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
+    value = 1
+    return os.path.join(values)
+
+def small():
+    'this function is checked completely'
+    value = 1
+    return os.sep
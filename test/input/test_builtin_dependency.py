@@ -0,0 +1,7 @@
+'use a dependency using a builtin module'
+
+import builtin_dependency
+
+def isObject(c):
+    'return whether c is object'
+    return builtin_dependency.isObject(c)
@@ -0,0 +1,10 @@
+'debug the checking of one function'
+
+def traced(a):
+    'the instructions of this function are traced'
+    __pychecker__ = 'debug'
+    return a + 1
+
+def untraced(a):
+    'the instructions of this function are not'
+    return a - 1
@@ -0,0 +1,8 @@
+'import a dependency and a module it imports'
+
+import string
+import imported_dependency
+
+def strip(word):
+    'strip the word'
+    return string.strip(word)
@@ -0,0 +1,20 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+# warnings of every level, for checking with --level
+import string
+
+def unreachable():
+    value = 1
+    return '%s %s' % (value,)
+    print 'not reached'
+
+def returns(a):
+    if a:
+        return 1
+    return 'one'
+
+class NoDoc:
+    def method(self, arg):
+        self.member = 1
+        return self.member.attribute.other.more.and_more.still_more
@@ -0,0 +1,10 @@
+'test warnings of different kinds, and repeated, on the same line'
+
+def noEffect(a):
+    'statements without effect'
+    a; +a; a; +a
+
+def security(a):
+    'exec and input'
+    exec a; a = input(); exec a
+    return a
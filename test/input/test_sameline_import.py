@@ -0,0 +1,8 @@
+'import a module checked by another worker as well'
+
+import test_sameline
+
+def useBoth():
+    'call both functions'
+    test_sameline.noEffect(1)
+    return test_sameline.security(2)
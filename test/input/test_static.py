@@ -0,0 +1,23 @@
+'test checking a module whose imports are not installed'
+
+import sys
+import not_installed_module
+from not_installed_package import Base
+
+print 'loading'
+
+def f(a):
+    return a
+
+def g():
+    return f()
+
+class A(Base):
+    'the base is unknown, so attributes may come from it'
+    def m(self):
+        return self.missing
+
+class B:
+    'd'
+    def m(self):
+        return self.missing
@@ -0,0 +1,4 @@
+import UserDict
+
+class A(UserDict.UserDict):
+    pass
@@ -0,0 +1,4 @@
+import UserDict
+
+class B(UserDict.UserDict):
+    pass
@@ -0,0 +1,207 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to caching warnings on disk.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+import common
+
+from pychecker import cache
+from pychecker import Config
+from pychecker import msgs
+
+class ResultCacheTestCase(common.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(__file__))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def check(self, paths, config):
+        from pychecker.check import _check
+        return _check(paths, cfg=config)
+
+    def test_cached(self):
+        config = Config.Config()
+        config.cacheDir = self.directory
+        path = 'input/unused_import.py'
+
+        resultCache = cache.ResultCache(self.directory, 10, config)
+        self.assertEquals(resultCache.get(path), None)
+
+        warnings = self.check([path], config)
+        self.assertEquals(len(warnings), 4)
+
+        cached = resultCache.get(path)
+        self.assertEquals([w.format() for w in cached],
+                          [w.format() for w in warnings])
+        self.assertEquals([w.format() for w in self.check([path], config)],
+                          [w.format() for w in warnings])
+
+        # a different configuration does not use the entry
+        config.importUsed = 0
+        resultCache = cache.ResultCache(self.directory, 10, config)
+        self.assertEquals(resultCache.get(path), None)
+
+    def test_subset(self):
+        config = Config.Config()
+        config.cacheDir = self.directory
+        paths = ['input/unused_import.py', 'input/test_global.py']
+        for path in paths:
+            config.files[os.path.abspath(path)] = 1
+        warnings = self.check(paths, config)
+
+        # the entry is used when checking only one of the files again
+        config = Config.Config()
+        config.cacheDir = self.directory
+        config.files[os.path.abspath(paths[0])] = 1
+        resultCache = cache.ResultCache(self.directory, 10, config)
+        self.assertEquals([w.format() for w in resultCache.get(paths[0])],
+                          [w.format() for w in warnings
+                                   if w.file == paths[0]])
+
+        # with --only, what matters is whether the file was given
+        config.only = 1
+        resultCache = cache.ResultCache(self.directory, 10, config)
+        self.assertEquals(resultCache.get(paths[0]), None)
+        self.check([paths[0]], config)
+        self.failIfEqual(resultCache.get(paths[0]), None)
+        del config.files[os.path.abspath(paths[0])]
+        resultCache = cache.ResultCache(self.directory, 10, config)
+        self.assertEquals(resultCache.get(paths[0]), None)
+
+    def test_messages(self):
+        config = Config.Config()
+        config.cacheDir = self.directory
+        path = 'input/test_sameline.py'
+        warnings = self.check([path], config)
+
+        # messages compare by identity, so they must not be copies
+        cached = cache.ResultCache(self.directory, 10, config).get(path)
+        self.assertEquals(cached[0].err, msgs.POSSIBLE_STMT_WITH_NO_EFFECT)
+        self.failUnless(cached[0].err is warnings[0].err)
+        self.assertEquals([w.format() for w in self.check([path], config)],
+                          [w.format() for w in warnings])
+
+    def test_indirect(self):
+        os.chdir(self.directory)
+        for name, source in (('indirect_a.py', 'import indirect_b\n'),
+                             ('indirect_b.py', 'import indirect_c\n'),
+                             ('indirect_c.py', 'c = 1\n')):
+            f = open(name, 'w')
+            f.write(source)
+            f.close()
+
+        config = Config.Config()
+        config.cacheDir = 'cache'
+        self.check(['indirect_a.py'], config)
+        resultCache = cache.ResultCache('cache', 10, config)
+        self.failIfEqual(resultCache.get('indirect_a.py'), None)
+
+        # a change two imports away invalidates the entry
+        f = open('indirect_c.py', 'w')
+        f.write('c = 2\n')
+        f.close()
+        os.utime('indirect_c.py', (0, 0))
+        self.assertEquals(resultCache.get('indirect_a.py'), None)
+
+class ImportGraphTestCase(common.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def write(self, name, source):
+        f = open(name, 'w')
+        f.write(source)
+        f.close()
+
+    def test_incremental(self):
+        self.write('incremental_a.py',
+            'import incremental_b\n\ndef a():\n    return incremental_b.b()\n')
+        self.write('incremental_b.py', 'def b(x):\n    return x\n')
+        self.write('incremental_c.py', 'def c():\n    return 1\n')
+
+        config = Config.Config()
+        config.incremental = 1
+        config.cacheDir = 'cache'
+        from pychecker.check import _check
+        warnings = _check(['incremental_a.py', 'incremental_c.py'],
+                          cfg=config)
+        self.assertEquals(len(warnings), 1)
+
+        graph = cache.ImportGraph('cache', config)
+        self.assertEquals([w.format() for w in graph.get('incremental_a.py')],
+                          [w.format() for w in warnings])
+        self.assertEquals(graph.get('incremental_c.py'), [])
+        self.assertEquals(graph.get('incremental_b.py'), None)
+
+        # changing a module invalidates the modules importing it
+        self.write('incremental_b.py', 'def b():\n    return 1\n')
+        os.utime('incremental_b.py', (0, 0))
+        graph = cache.ImportGraph('cache', config)
+        self.assertEquals(graph.get('incremental_a.py'), None)
+        self.assertEquals(graph.get('incremental_c.py'), [])
+
+    def test_subset(self):
+        self.write('subset_a.py', 'import sys\n')
+        self.write('subset_b.py', 'import os\n')
+        files = ['subset_a.py', 'subset_b.py']
+
+        config = Config.Config()
+        config.incremental = 1
+        config.cacheDir = 'cache'
+        for file in files:
+            config.files[os.path.abspath(file)] = 1
+        from pychecker.check import _check
+        warnings = _check(files, cfg=config)
+
+        # a run on some of the files uses the graph of the others
+        config = Config.Config()
+        config.incremental = 1
+        config.cacheDir = 'cache'
+        config.files[os.path.abspath(files[0])] = 1
+        graph = cache.ImportGraph('cache', config)
+        self.assertEquals([w.format() for w in graph.get(files[0])],
+                          [w.format() for w in warnings
+                                   if w.file == files[0]])
+
+        config.only = 1
+        graph = cache.ImportGraph('cache', config)
+        self.assertEquals(graph.get(files[1]), None)
+
+    def test_same_as_fresh(self):
+        # warnings on the same line are sorted by their message, which
+        # compares by identity
+        self.write('fresh_a.py', 'def a(x):\n    x; +x; x; +x\n')
+        self.write('fresh_b.py', 'def b(x):\n    +x; x\n')
+        files = ['fresh_a.py', 'fresh_b.py']
+
+        from pychecker.check import _check
+        fresh = [w.format() for w in _check(files, cfg=Config.Config())]
+
+        config = Config.Config()
+        config.incremental = 1
+        config.cacheDir = 'cache'
+        _check(files, cfg=config)
+        graph = cache.ImportGraph('cache', config)
+        self.failUnless(graph.get('fresh_a.py')[0].err in
+                        (msgs.POSSIBLE_STMT_WITH_NO_EFFECT,
+                         msgs.UNARY_POSITIVE_HAS_NO_EFFECT))
+        self.assertEquals([w.format() for w in _check(files, cfg=config)],
+                          fresh)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,6 +29,7 @@ class InternalTestCase(common.TestCase):
     def check(self, paths):
         config = Config.Config()
         config.ignoreStandardLibrary = 1
+        config.keepCodes = 1
         if os.environ.get('PYCHECKER_DEBUG'):
             config.debug = 1
 
@@ -210,5 +211,67 @@ class StarImportTestCase(InternalTestCase):
         # self.assertEquals(pcmodule.codes[0].stack, [])
         self.assertEquals(pcmodule.codes[1].stack, [])
 
+class CodesTestCase(InternalTestCase):
+    def test_codes_not_kept(self):
+        config = Config.Config()
+        config.ignoreStandardLibrary = 1
+        from pychecker.check import _check
+        _check(['input/test_global.py', ], cfg=config)
+
+        pcmodule = pcmodules.getPCModule("test_global", moduleDir="input")
+        self.assertEquals(pcmodule.codes, [])
+        # the summary of each function is kept
+        self.failUnless(pcmodule.functions['test1'].returnsNoValue())
+
+class LazyModuleTestCase(InternalTestCase):
+    def test_lazy_dependency(self):
+        self.check(['input/unused_import.py', ])
+
+        pcmodule = pcmodules.getPCModule("unused_import", moduleDir="input")
+        sax = pcmodule.modules['sax']
+        self.failIf(sax.check)
+        self.failUnless('make_parser' in sax.attributes)
+
+        # the classes of a dependency are only set up when looked up
+        classes = sax.classes
+        self.failUnless(isinstance(classes, pcmodules._LazyClasses))
+        self.failUnless(classes.has_key('SAXException'))
+        self.assertEquals(dict.get(classes, 'SAXException'), None)
+        c = classes['SAXException']
+        self.assertEquals(c.name, 'SAXException')
+        self.failUnless(c.methods.has_key('getMessage'))
+        self.failUnless(dict.get(classes, 'SAXException') is c)
+        self.failUnless(sax.functions.has_key('make_parser'))
+
+        # inherited attributes are looked up in the index of the class
+        self.assertEquals(c.attributes, None)
+        self.failUnless(c.hasAttribute('getMessage'))
+        self.failIf(c.hasAttribute('noSuchAttribute'))
+        self.failUnless(c.attributes.has_key('__reduce__'))
+        self.failUnless(c.hasAttribute('__reduce__'))
+
+    def test_lazy_builtin(self):
+        self.check(['input/test_builtin_dependency.py', ])
+
+        # the tokens of the dependency are set up after the attributes of
+        # the builtin modules loaded until then were fixed up
+        pcmodule = pcmodules.getPCModule("builtin_dependency")
+        builtin = pcmodule.modules['__builtin__']
+        self.failUnless('object' in builtin.attributes)
+
+    def test_lazy_imported(self):
+        self.check(['input/test_imported_dependency.py', ])
+
+        # the loaded modules a dependency imports are found without
+        # setting up its tokens
+        pcmodule = pcmodules.getPCModule("test_imported_dependency",
+                                         moduleDir="input")
+        dependency = pcmodule.modules['imported_dependency']
+        self.assertEquals(dependency.getImportedModules(),
+                          [pcmodule.modules['string']])
+        self.failIf(dependency.__dict__.has_key('modules'))
+        self.assertEquals(dependency.modules.values(),
+                          [pcmodule.modules['string']])
+
 if __name__ == '__main__':
     unittest.main()
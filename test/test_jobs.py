@@ -0,0 +1,32 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to checking in several processes.
+'''
+
+import unittest
+import common
+
+class JobsTestCase(common.TestCase):
+    '''
+    Test that checking in worker processes gives the serial output.
+    '''
+    def test_jobs(self):
+        self.checkMultiple('test_jobs', [
+            'test_dict.py',
+            'test_global.py',
+            'test_string_format.py',
+            'unused_import.py',
+            ], '-Q --jobs 2')
+
+    def testSerial(self):
+        # both workers find the warnings of test_sameline, which must be
+        # sorted by their message and merged, and the processing lines
+        # must be written in order
+        files = ['test_sameline.py', 'test_sameline_import.py']
+        common.diffStrings(self.getOutput(files),
+                           self.getOutput(files, '--jobs 2'))
+
+if __name__ == '__main__':
+    unittest.main()
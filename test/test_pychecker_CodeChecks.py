@@ -8,7 +8,7 @@ Tests related to pychecker.CodeChecks
 import unittest
 import common
 
-from pychecker import CodeChecks
+from pychecker import CodeChecks, utils, Config
 
 class DispatchTestCase(common.TestCase):
     '''
@@ -37,5 +37,55 @@ class OpcodesTestCase(common.TestCase):
     def test_INPLACE_TRUE_DIVIDE(self):
         self.check('future_divide')
 
+class CodeTestCase(common.TestCase):
+    '''
+    Test the state kept while checking code.
+    '''
+    def setUp(self):
+        utils.initConfig(Config.Config())
+
+    def tearDown(self):
+        utils.popConfig()
+
+    def testIndexList(self):
+        from pychecker import function
+        def func(a):
+            a = a + 1
+            a = a * 2
+            return a
+        code = CodeChecks.Code()
+        code.init(function.Function(func))
+        while code.index < code.maxCode:
+            code.popNextOp()
+        # only the offsets of the last three instructions are kept
+        self.assertEquals(len(code.indexList), 3)
+        self.assertEquals(code.indexList[-1],
+                          code.instructions.offsets[code.opIndex - 1])
+        self.failIf(hasattr(code, '__dict__'))
+
+    def testConstantRun(self):
+        from pychecker import function
+        def func():
+            return [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        code = CodeChecks.Code()
+        code.init(function.Function(func))
+        end = code.instructions.constantRuns[0]
+        code.popConstantRun(end)
+        fast = code.stack[:]
+        fastState = code.index, code.indexList[:]
+
+        code = CodeChecks.Code()
+        code.init(function.Function(func))
+        while code.opIndex < end:
+            op, oparg, operand = code.popNextOp()
+            CodeChecks.DISPATCH[op](oparg, operand, None, code)
+
+        self.assertEquals(len(fast), 1)
+        self.assertEquals(len(code.stack), 1)
+        self.assertEquals(fast[0].type, code.stack[0].type)
+        self.assertEquals([item.data for item in fast[0].data],
+                          [item.data for item in code.stack[0].data])
+        self.assertEquals(fastState, (code.index, code.indexList))
+
 if __name__ == '__main__':
     unittest.main()
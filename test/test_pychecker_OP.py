@@ -0,0 +1,99 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_OP -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.OP
+'''
+
+import unittest
+import common
+
+from pychecker import OP, function
+
+def _sample(a, b=1):
+    c = a + b
+    for i in range(c):
+        if i:
+            return lambda: i
+    return c
+
+def _literals(a):
+    x = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    y = (1, 2, 3)
+    z = {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5, 'f': 6, 'g': 7, 'h': 8}
+    return [a, 2, 3, 4, 5, 6, 7, 8, 9]
+
+class InstructionsTestCase(common.TestCase):
+    '''
+    Test that the decoded instructions match decoding the raw bytes.
+    '''
+    def testDecode(self):
+        func_code = _sample.func_code
+        instructions = OP.getInstructions(func_code)
+
+        code = func_code.co_code
+        i, extended_arg, number = 0, 0, 0
+        while i < len(code):
+            self.assertEquals(instructions.offsets[number], i)
+            self.assertEquals(instructions.numbers[i], number)
+            op, oparg, i, extended_arg = OP.getInfo(code, i, extended_arg)
+            self.assertEquals(instructions.ops[number], op)
+            if op >= OP.HAVE_ARGUMENT:
+                self.assertEquals(instructions.opargs[number], oparg)
+                self.assertEquals(instructions.operands[number],
+                    OP.getOperand(op, func_code, oparg))
+                self.assertEquals(instructions.getLabel(number),
+                    OP.getLabel(op, oparg, i))
+            else:
+                self.assertEquals(instructions.operands[number], None)
+                self.assertEquals(instructions.getLabel(number), None)
+            number = number + 1
+
+        self.assertEquals(len(instructions), number)
+        self.assertEquals(instructions.offsets[number], len(code))
+
+    def testLineNum(self):
+        func_code = _sample.func_code
+        instructions = OP.getInstructions(func_code)
+
+        # walk co_lnotab linearly for every offset
+        co_lnotab = func_code.co_lnotab
+        for offset in range(len(func_code.co_code)):
+            lineno = func_code.co_firstlineno
+            addr = 0
+            for lnotab_index in range(0, len(co_lnotab), 2):
+                addr = addr + ord(co_lnotab[lnotab_index])
+                if addr > offset:
+                    break
+                lineno = lineno + ord(co_lnotab[lnotab_index+1])
+            self.assertEquals(instructions.getLineNum(offset), lineno)
+
+    def testCached(self):
+        func_code = _sample.func_code
+        instructions = OP.getInstructions(func_code)
+        self.failUnless(OP.getInstructions(func_code) is instructions)
+
+        # fake code wrapping the same code object shares the decoding
+        fake = function.create_fake('_sample', func_code)
+        self.failUnless(
+            OP.getInstructions(fake.function.func_code) is instructions)
+
+        OP.clearInstructions()
+        self.failIf(OP.getInstructions(func_code) is instructions)
+
+    def testConstantRuns(self):
+        instructions = OP.getInstructions(_literals.func_code)
+        runs = instructions.constantRuns.items()
+        runs.sort()
+        # the short tuple is folded by the compiler, and the last list
+        # has an item which is not constant
+        self.assertEquals(len(runs), 2)
+        (listStart, listEnd), (dictStart, dictEnd) = runs
+        self.assertEquals(listEnd - listStart, 10)
+        self.assertEquals(OP.name[instructions.ops[listEnd - 1]],
+                          'BUILD_LIST')
+        self.assertEquals(OP.name[instructions.ops[dictStart]], 'BUILD_MAP')
+        self.assertEquals(dictEnd - dictStart, 1 + 8 * 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,5 +40,33 @@ class GeneratorTestCase(common.TestCase):
         else:
             self.assertEquals(f.arguments(), ('.0', ))
 
+class SignatureTestCase(common.TestCase):
+    '''
+    Test that the arguments of a function are worked out once.
+    '''
+    def testArguments(self):
+        def func(a, b=[], *args, **kwargs):
+            c = a
+            return c
+
+        f = function.Function(func)
+        self.assertEquals(f.arguments(), ('a', 'b', 'args', 'kwargs'))
+        self.assertEquals((f.minArgs, f.maxArgs), (1, None))
+        self.failUnless(f.supportsKW)
+        self.assertEquals(f.varArgName(), 'args')
+        self.failUnless(f.isParam('kwargs'))
+        self.failIf(f.isParam('c'))
+        self.failIf(f.isParam(['unhashable']))
+        self.assertEquals(f.argumentIndex('b'), 1)
+        self.assertEquals(f.defaultValue('b'), [])
+        self.assertRaises(ValueError, f.defaultValue, 'a')
+        self.assertRaises(ValueError, f.defaultValue, 'args')
+
+        # functions with the same code share the signature
+        self.failUnless(function.Function(func).signature is f.signature)
+
+        function.clearSignatures()
+        self.failIf(function.Function(func).signature is f.signature)
+
 if __name__ == '__main__':
     unittest.main()
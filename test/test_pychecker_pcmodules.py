@@ -0,0 +1,91 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_pcmodules -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.pcmodules
+'''
+
+import unittest
+import common
+
+from pychecker import pcmodules, utils, Config, OP, function
+
+class Base:
+    def __init__(self):
+        self.base = 1
+
+    def abstract(self):
+        raise NotImplementedError
+
+class Left(Base):
+    def __init__(self):
+        Base.__init__(self)
+        self.left = 'left'
+
+class Right(Base):
+    def right(self):
+        self.right = []
+
+class Both(Left, Right):
+    def abstract(self):
+        return 1
+
+class ClassModelTestCase(common.TestCase):
+    '''
+    Test that the model of a class object is made from those of its bases.
+    '''
+    def setUp(self):
+        utils.initConfig(Config.Config())
+
+    def tearDown(self):
+        utils.popConfig()
+
+    def testShared(self):
+        model = pcmodules.getClassModel(Both)
+        self.failUnless(pcmodules.getClassModel(Both) is model)
+        self.assertEquals(model.baseClasses, [Left, Base, Right, Base])
+        self.failUnless(model.getMembers() is model.getMembers())
+
+    def testMembers(self):
+        methods, members = pcmodules.getClassModel(Both).getMembers()
+        for name in ('__init__', 'abstract', 'right', '__class__'):
+            self.failUnless(methods.has_key(name), name)
+        self.failUnless(methods['abstract'].im_class is Both)
+        self.assertEquals(members['base'], type(1))
+        # Left.__init__ overrides Base.__init__, but both set members
+        self.assertEquals(members['left'], type(''))
+        self.assertEquals(members['right'], None)
+
+    def testAbstract(self):
+        self.assertEquals(
+            pcmodules.getClassModel(Left).getAbstractMethods(), ['abstract'])
+        self.assertEquals(
+            pcmodules.getClassModel(Both).getAbstractMethods(), [])
+
+    def testConfig(self):
+        model = pcmodules.getClassModel(Both)
+        config = Config.Config()
+        config.onlyCheckInitForMembers = 1
+        utils.initConfig(config)
+        try:
+            members = model.getMembers()[1]
+        finally:
+            utils.popConfig()
+        self.failIf(members.has_key('right'))
+        self.failUnless(model.getMembers()[1].has_key('right'))
+
+class RemoveTestCase(common.TestCase):
+    '''
+    Test that forgetting a module forgets what is cached for its code.
+    '''
+    def testCaches(self):
+        pcmodule = pcmodules.PyCheckerModule('forgotten')
+        OP.getInstructions(Base.abstract.func_code)
+        function.Function(Base.abstract)
+        pcmodules.removePCModule(pcmodule)
+        self.assertEquals(pcmodules.getPCModule('forgotten'), None)
+        self.assertEquals(OP._instructions_cache, {})
+        self.assertEquals(function._signatures, {})
+
+if __name__ == '__main__':
+    unittest.main()
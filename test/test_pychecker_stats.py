@@ -0,0 +1,65 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_stats -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.stats
+'''
+
+import os
+import unittest
+import common
+
+from pychecker import stats, CodeChecks, Config
+
+class StatsTestCase(common.TestCase):
+    '''
+    Test that checking records timing only when enabled.
+    '''
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        stats.disable()
+        stats.reset()
+
+    def check(self):
+        from pychecker import check
+        return check._check(['input/test_dict.py'], cfg=Config.Config())
+
+    def testDisabled(self):
+        dispatch = CodeChecks.DISPATCH[:]
+        self.check()
+        self.assertEquals(stats.getData(), {'phases': {}, 'modules': {},
+                                            'handlers': {}, 'functions': []})
+        self.assertEquals(CodeChecks.DISPATCH, dispatch)
+
+    def testEnabled(self):
+        dispatch = CodeChecks.DISPATCH[:]
+        stats.enable()
+        self.check()
+        data = stats.getData()
+        for phase in ('import', 'main code', 'functions', 'classes',
+                      'filter'):
+            self.failUnless(phase in data['phases'], phase)
+        self.failUnless('test_dict' in data['modules'])
+        self.failUnless(data['handlers']['LOAD_CONST']['count'] > 0)
+        self.failUnless(len(data['functions']) <= stats.SLOWEST)
+
+        stats.disable()
+        self.assertEquals(CodeChecks.DISPATCH, dispatch)
+
+    def testMerge(self):
+        stats.enable()
+        started = stats.start()
+        stats.addPhase('import', started, 'mod')
+        data = stats.getData()
+        stats.merge(data)
+        merged = stats.getData()
+        self.assertEquals(merged['phases']['import']['count'], 2)
+        self.assertEquals(merged['modules']['mod']['import'],
+                          data['modules']['mod']['import'] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_trace -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.trace
+'''
+
+import os
+import sys
+import shutil
+import tempfile
+import StringIO
+import unittest
+import common
+
+from pychecker import trace, Config
+
+class TraceTestCase(common.TestCase):
+    '''
+    Test that the trace file can be replayed.
+    '''
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'trace')
+
+    def tearDown(self):
+        trace.disable()
+        shutil.rmtree(self.directory)
+        os.chdir(self.cwd)
+
+    def check(self):
+        config = Config.Config()
+        config.ignoreStandardLibrary = 1
+        from pychecker import check
+        return check._check(['input/nested.py'], cfg=config)
+
+    def testDisabled(self):
+        self.failIf(trace.enabled)
+        trace.enable()
+        self.failIf(trace.enabled)
+
+    def testReplay(self):
+        trace.enable(self.filename)
+        self.failUnless(trace.enabled)
+        warnings = self.check()
+        trace.disable()
+
+        events = list(trace.read(self.filename))
+        self.assertEquals(events[0], ('F', 'input/nested.py', 4, '<module>'))
+        self.assertEquals(events[1][:3], ('I', 0, 'LOAD_CONST'))
+        self.failUnless(('N', 'input/nested.py', 11, 'first') in events)
+        self.assertEquals(len([e for e in events if e[0] == 'F']),
+                          len([e for e in events if e[0] == 'E']))
+
+        # warnings found outside of the code, like unused imports, are
+        # not traced
+        found = [(w.file, w.line, str(w.err)) for w in warnings]
+        traced = [(e[1], e[2], e[3]) for e in events if e[0] == 'W']
+        self.failUnless(traced)
+        for w in traced:
+            self.failUnless(w in found, w)
+
+        slowest = trace.slowest(self.filename, 1)
+        self.assertEquals(len(slowest), 1)
+        seconds, instructions, filename, line, name = slowest[0]
+        self.failUnless(instructions > 0)
+
+    def checkDebug(self, filename, config):
+        from pychecker import check
+        stdout = sys.stdout
+        sys.stdout = output = StringIO.StringIO()
+        try:
+            check._check([filename], cfg=config)
+        finally:
+            sys.stdout = stdout
+        return output.getvalue()
+
+    def testDebugOption(self):
+        # library use prints the debug output without enabling tracing
+        config = Config.Config()
+        config.ignoreStandardLibrary = 1
+        config.debug = 1
+        output = self.checkDebug('input/nested.py', config)
+        self.failIf(trace.enabled)
+        self.failUnless('DEBUG: DIS' in output)
+        self.failUnless('handling nested code' in output)
+
+    def testDebugSuppression(self):
+        config = Config.Config()
+        config.ignoreStandardLibrary = 1
+        output = self.checkDebug('input/test_debug.py', config)
+        self.failUnless('BINARY_ADD' in output)
+        self.failIf('BINARY_SUBTRACT' in output)
+
+if __name__ == '__main__':
+    unittest.main()
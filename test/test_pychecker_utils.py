@@ -0,0 +1,135 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_utils -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.utils
+'''
+
+import os
+import sys
+import imp
+import shutil
+import tempfile
+import unittest
+import common
+
+from pychecker import utils, Config
+
+class FindModuleTestCase(common.TestCase):
+    '''
+    Test that modules are found from the cached directory listings.
+    '''
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        utils.initConfig(Config.Config())
+
+    def tearDown(self):
+        utils.popConfig()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data=''):
+        f = open(os.path.join(self.directory, name), 'w')
+        f.write(data)
+        f.close()
+
+    def testPackage(self):
+        os.mkdir(os.path.join(self.directory, 'pkg'))
+        self.write(os.path.join('pkg', '__init__.py'))
+        self.write(os.path.join('pkg', 'sub.py'))
+
+        handle, filename, smt = utils.findModule('pkg.sub', self.directory)
+        handle.close()
+        self.assertEquals(filename,
+                          os.path.join(self.directory, 'pkg', 'sub.py'))
+        self.assertEquals(smt[-1], imp.PY_SOURCE)
+
+        handle, filename, smt = utils.findModule('pkg', self.directory)
+        self.assertEquals(handle, None)
+        self.assertEquals(smt[-1], imp.PKG_DIRECTORY)
+
+    def testRelativeImport(self):
+        os.mkdir(os.path.join(self.directory, 'relpkg'))
+        self.write(os.path.join('relpkg', '__init__.py'))
+        self.write(os.path.join('relpkg', 'a.py'), 'from . import b\n')
+        self.write(os.path.join('relpkg', 'b.py'))
+
+        # the package is loaded, so its modules can import from it
+        handle, filename, smt = utils.findModule('relpkg.a', self.directory)
+        try:
+            self.failUnless(sys.modules.has_key('relpkg'))
+            module = imp.load_module('relpkg.a', handle, filename, smt)
+        finally:
+            handle.close()
+            for name in ('relpkg', 'relpkg.a', 'relpkg.b'):
+                if sys.modules.has_key(name):
+                    del sys.modules[name]
+        self.assertEquals(module.b.__name__, 'relpkg.b')
+
+    def testChanged(self):
+        path = [self.directory]
+        self.assertRaises(ImportError, utils.resolveModule, 'late', path)
+
+        # make sure the directory modification time changes
+        self.write('late.py')
+        mtime = os.stat(self.directory).st_mtime
+        os.utime(self.directory, (mtime + 1, mtime + 1))
+
+        filename, smt = utils.resolveModule('late', path)
+        self.assertEquals(filename, os.path.join(self.directory, 'late.py'))
+        self.assertEquals(smt, imp.find_module('late', path)[2])
+
+    def testSameAsImp(self):
+        for name in ('os', 'string', 'xml', 'unittest'):
+            handle, filename, smt = imp.find_module(name)
+            if handle is not None:
+                handle.close()
+            self.assertEquals(utils.resolveModule(name, sys.path),
+                              (filename, smt))
+
+class ConfigStackTestCase(common.TestCase):
+    '''
+    Test that pushed configurations only change the top of the stack.
+    '''
+    def setUp(self):
+        self.config = Config.Config()
+        utils.initConfig(self.config)
+
+    def tearDown(self):
+        utils.popConfig()
+
+    def testPush(self):
+        utils.pushConfig()
+        self.failIf(utils.cfg() is self.config)
+        self.assertEquals(utils.cfg().maxArgs, 10)
+
+        utils.updateCheckerArgs('maxargs=3 no-import', 'suppressions', 0, [])
+        self.assertEquals(utils.cfg().maxArgs, 3)
+        self.assertEquals(utils.cfg().importUsed, 0)
+        self.assertEquals(utils.cfg().maxLocals, 40)
+
+        utils.pushConfig()
+        self.assertEquals(utils.cfg().maxArgs, 3)
+        utils.popConfig()
+
+        utils.popConfig()
+        self.failUnless(utils.cfg() is self.config)
+        self.assertEquals(self.config.maxArgs, 10)
+        self.assertEquals(self.config.importUsed, 1)
+
+    def testNoSuppression(self):
+        from pychecker import warn
+        depth = len(utils._cfg)
+        suppressions = ({'mod.func': 'no-import'}, {})
+        self.assertEquals(warn.getSuppression('mod.other', suppressions, []),
+                          None)
+        self.assertEquals(len(utils._cfg), depth)
+
+        self.assertEquals(warn.getSuppression('mod.func', suppressions, []),
+                          'no-import')
+        self.assertEquals(len(utils._cfg), depth + 1)
+        self.assertEquals(utils.cfg().importUsed, 0)
+        utils.popConfig()
+        self.assertEquals(self.config.importUsed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
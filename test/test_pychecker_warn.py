@@ -0,0 +1,202 @@
+# -*- Mode: Python; test-case-name: test.test_pychecker_warn -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to pychecker.warn
+'''
+
+import os
+import time
+import unittest
+import common
+
+from pychecker import warn, msgs, Config
+from pychecker.Warning import Warning
+
+class FilterTestCase(common.TestCase):
+    '''
+    Test that warnings are filtered on their file and level.
+    '''
+    def testFilter(self):
+        config = Config.Config()
+        config.level = msgs.Warning.level
+        blacklist = [warn.normalize_path('/lib/black')]
+        warningFilter = warn._WarningFilter(blacklist, ['/lib/std/'], config)
+
+        unused = msgs.VAR_NOT_USED % 'x'
+        self.failUnless(unused.level < config.level)
+        error = msgs.INVALID_CHECKER_ARGS % 'x'
+        kept = Warning('mine.py', 1, error)
+        warnings = [
+            kept,
+            Warning('mine.py', 2, unused),
+            # blacklisted paths are prefixes
+            Warning('/lib/black.py', 1, error),
+            Warning('/lib/blackish/x.py', 1, error),
+            Warning('/lib/std/os.py', 1, error),
+            ]
+        self.assertEquals(warningFilter.filter(warnings), [kept])
+
+    def testOnly(self):
+        config = Config.Config()
+        config.only = 1
+        config.files[os.path.abspath('mine.py')] = 1
+        warningFilter = warn._WarningFilter([], None, config)
+
+        self.failUnless(warningFilter.keep(
+            Warning('mine.py', 1, msgs.NO_MODULE_DOC)))
+        self.failIf(warningFilter.keep(
+            Warning('other.py', 1, msgs.NO_MODULE_DOC)))
+
+class LimitTestCase(common.TestCase):
+    '''
+    Test that the most severe warnings are kept.
+    '''
+    def testLimit(self):
+        warnings = []
+        for line in range(1, 6):
+            warnings.append(Warning('a.py', line, msgs.VAR_NOT_USED % 'x'))
+        error = Warning('b.py', 1, msgs.INVALID_CHECKER_ARGS % 'x')
+        warnings.append(error)
+        # duplicates are not counted
+        warnings.append(Warning('b.py', 1, msgs.INVALID_CHECKER_ARGS % 'x'))
+
+        warn.limitWarnings(warnings, 3)
+        self.assertEquals([(w.file, w.line) for w in warnings],
+            [('a.py', 4), ('a.py', 5), ('b.py', 1), ('', 0)])
+        self.assertEquals(str(warnings[-1].err),
+            str(msgs.TOO_MANY_WARNINGS % 3))
+
+    def testUnderLimit(self):
+        warnings = [Warning('b.py', 1, msgs.VAR_NOT_USED % 'x'),
+                    Warning('a.py', 1, msgs.VAR_NOT_USED % 'x'),
+                    Warning('a.py', 1, msgs.VAR_NOT_USED % 'x')]
+        warn.limitWarnings(warnings, 3)
+        self.assertEquals([(w.file, w.line) for w in warnings],
+            [('a.py', 1), ('b.py', 1)])
+
+class LevelTestCase(common.TestCase):
+    '''
+    Test that checks below the level find what filtering would have kept.
+    '''
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def check(self, level):
+        from pychecker import check
+        config = Config.Config()
+        config.level = level
+        config.noDocModule = config.noDocClass = config.noDocFunc = 1
+        config.maxLines = 1
+        config.limit = 0
+        warnings = check._check(['input/test_level.py'], cfg=config)
+        warnings.sort()
+        return [(w.file, w.line, str(w.err), w.level) for w in warnings]
+
+    def testWarns(self):
+        config = Config.Config()
+        self.failUnless(config.warns(msgs.NO_MODULE_DOC))
+        config.level = msgs.Error.level
+        self.failIf(config.warns(msgs.NO_MODULE_DOC))
+        self.failUnless(config.warns(msgs.CODE_UNREACHABLE))
+
+    def testLevels(self):
+        warnings = self.check(0)
+        for level in (msgs.Style.level, msgs.Unused.level,
+                      msgs.Warning.level, msgs.Error.level):
+            kept = [w for w in warnings if w[3] >= level]
+            self.failUnless(kept)
+            self.assertEquals(self.check(level), kept)
+
+class BudgetTestCase(common.TestCase):
+    '''
+    Test that checking a function stops when it runs out of budget.
+    '''
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def check(self, config):
+        from pychecker import check
+        warnings = check._check(['input/test_budget.py'], cfg=config)
+        warnings.sort()
+        return [(w.line, str(w.err)) for w in warnings]
+
+    def testUnlimited(self):
+        warnings = self.check(Config.Config())
+        self.assertEquals(warnings, [(11, 'Local variable (value) not used'),
+                                     (18, 'Local variable (value) not used'),
+                                     (23, 'Local variable (value) not used')])
+
+    def testInstructions(self):
+        config = Config.Config()
+        config.maxInstructions = 20
+        warnings = self.check(config)
+        self.assertEquals(len(warnings), 3, warnings)
+        line, err = warnings[0]
+        self.assertEquals(line, 8)
+        self.failUnless(err.startswith(
+            'Stopped checking function (table) after 20 instructions'), err)
+        # the __pychecker__ in the function raises the limit
+        self.assertEquals(warnings[1:],
+                          [(18, 'Local variable (value) not used'),
+                           (23, 'Local variable (value) not used')])
+
+    def testNoticeLevel(self):
+        # stopping is a notice, kept below the level of any real warning
+        config = Config.Config()
+        config.maxInstructions = 20
+        config.level = msgs.Style.level
+        self.assertEquals(self.check(config),
+                          [(18, 'Local variable (value) not used'),
+                           (23, 'Local variable (value) not used')])
+
+    def testConstantRun(self):
+        from pychecker import utils, function, CodeChecks
+        def func():
+            return [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
+        config = Config.Config()
+        config.maxInstructions = 10
+        utils.initConfig(config)
+        try:
+            code = CodeChecks.Code()
+            code.init(function.Function(func))
+            self.failUnless(code.instructions.constantRuns[0] > 10)
+            codeSource = CodeChecks.CodeSource(None, None, None, 0, 0, code)
+            budget = codeSource.budget = warn._Budget()
+            warn._checkCode(code, codeSource)
+        finally:
+            utils.popConfig()
+        # a run longer than the budget is not checked at once
+        self.failUnless(budget.truncated)
+        self.assertEquals(code.opIndex, 10)
+        self.assertEquals(budget.used()[0], 10)
+
+    def testModule(self):
+        from pychecker import utils
+        config = Config.Config()
+        config.maxModuleMilliseconds = 1000
+        utils.initConfig(config)
+        try:
+            warn._moduleStarted = time.time()
+            budget = warn._Budget()
+            self.assertEquals(budget.renew(), warn._BUDGET_INTERVAL)
+
+            warn._moduleStarted = time.time() - 1
+            self.assertEquals(budget.renew(), 0)
+            self.failUnless(budget.truncated)
+            self.failUnless(warn._moduleTruncated)
+        finally:
+            warn._moduleStarted = None
+            warn._moduleTruncated = 0
+            utils.popConfig()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to checking through a server.
+'''
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import StringIO
+import unittest
+import common
+
+from pychecker import server
+
+class ServerTestCase(common.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        testdir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(testdir)
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'socket')
+        self.checker = os.path.join(os.path.dirname(testdir),
+                                    'pychecker', 'checker.py')
+        self.process = subprocess.Popen(
+            [sys.executable, self.checker, '--server', self.path])
+        for i in range(100):
+            if os.path.exists(self.path):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self):
+        self.process.terminate()
+        self.process.wait()
+        shutil.rmtree(self.directory)
+        os.chdir(self.cwd)
+
+    def test_server(self):
+        # the server does not report processing files
+        expected = open('expected/test_global').read()
+        expected = expected[expected.index('\n') + 1:]
+
+        args = ['--limit', '0', '--no-argsused', 'input/test_global.py']
+        for i in range(2):
+            output = StringIO.StringIO()
+            status = server.connect(self.path, args, output)
+            self.assertEquals(status, 1)
+            common.diffStrings(expected, output.getvalue(), 'test_global')
+
+    def test_stderr(self):
+        # errors importing a module are written to the client, as the
+        # command line writes them to stderr
+        broken = os.path.join(self.directory, 'broken.py')
+        f = open(broken, 'w')
+        f.write('raise ValueError("broken")\n')
+        f.close()
+
+        args = ['-Q', broken]
+        process = subprocess.Popen([sys.executable, self.checker] + args,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        expected = process.communicate()[0]
+
+        output = StringIO.StringIO()
+        server.connect(self.path, args, output)
+        self.failUnless('ValueError: broken' in expected)
+        common.diffStrings(expected, output.getvalue(), 'broken')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to loading modules without running them.
+'''
+
+import unittest
+import common
+
+class StaticTestCase(common.TestCase):
+    '''
+    Test that modules are checked without importing them.
+    '''
+    def test_static(self):
+        self.check('test_static', '--static')
+    
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+# -*- Mode: Python -*-
+# vi:si:et:sw=4:sts=4:ts=4
+
+'''
+Tests related to printing warnings as modules are checked.
+'''
+
+import unittest
+import common
+
+_FILES = [
+    'test_dict.py',
+    'test_global.py',
+    'test_string_format.py',
+    'unused_import.py',
+    ]
+
+class StreamTestCase(common.TestCase):
+    '''
+    Test that streamed warnings are printed module by module, and that
+    merging them gives the usual sorted output.
+    '''
+    def test_stream(self):
+        self.checkMultiple('test_stream', _FILES, '-Q --stream')
+
+    def test_streamsorted(self):
+        self.checkMultiple('test_stream', _FILES, '-Q --streamsorted')
+
+    def test_duplicates(self):
+        # both modules find the warnings of their base class
+        files = ['test_stream_base.py', 'test_stream_base_import.py']
+        self.assertEquals(self.getOutput(files, '-Q --stream --limit 10'),
+                          self.getOutput(files, '-Q --limit 10'))
+    
+if __name__ == '__main__':
+    unittest.main()
@@ -5,9 +5,12 @@
 Tests related to suppressions.
 '''
 
+import re
 import unittest
 import common
 
+from pychecker import warn
+
 class NestedTestCase(common.TestCase):
     '''
     Test that suppressions inside nested code stay inside their
@@ -16,5 +19,42 @@ class NestedTestCase(common.TestCase):
     def test_getmodule(self):
         self.check('test_nestedsuppression', '--objattrs')
     
+class MatcherTestCase(common.TestCase):
+    '''
+    Test that the compiled suppressions match as trying each regex does.
+    '''
+    def test_match(self):
+        regexs = {}
+        for pattern, options in [
+            (r'mod\..*', 'no-import'),
+            (r'mod\.(a|ab)', 'no-local'),
+            (r'(?i)MOD\.C', 'no-argsused'),
+            (r'(m)od\.\1', 'no-shadow'),
+            ]:
+            regexs[re.compile(pattern)] = options
+        matcher = warn._SuppressionMatcher(({'mod.a': 'no-objattrs'}, regexs))
+
+        self.assertEquals(matcher.names.get('mod.a'), 'no-objattrs')
+        # the regexs apply in the order of their patterns
+        self.assertEquals(matcher.matchRegexs('mod.a'),
+                          ['no-local', 'no-import'])
+        # like before, the part matched must be the whole name
+        self.assertEquals(matcher.matchRegexs('mod.ab'), ['no-import'])
+        self.assertEquals(matcher.matchRegexs('mod.c'),
+                          ['no-argsused', 'no-import'])
+        self.assertEquals(matcher.matchRegexs('mod.m'),
+                          ['no-shadow', 'no-import'])
+        self.assertEquals(matcher.matchRegexs('other.a'), [])
+
+    def test_groups(self):
+        # more groups than fit in a single pattern
+        regexs = {}
+        for i in range(150):
+            regexs[re.compile(r'(m)(o)(d)\.f%d' % i)] = 'no-import'
+        matcher = warn._SuppressionMatcher(({}, regexs))
+        self.failUnless(len(matcher.combined) > 1)
+        self.assertEquals(matcher.matchRegexs('mod.f149'), ['no-import'])
+        self.assertEquals(matcher.matchRegexs('mod.g'), [])
+
 if __name__ == '__main__':
     unittest.main()